@@ -0,0 +1,92 @@
+"""Компактные словари для JSON API: только поля, которые нужны клиентам.
+
+Читают то же, что шаблоны, поэтому ждут querysets из
+Post.objects.for_feed() / for_detail() — лишних запросов нет.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from posts import thumbnails
+from posts.images import variants
+
+
+def author_data(user):
+    return {
+        'username': user.username,
+        'full_name': user.get_full_name(),
+    }
+
+
+def group_data(group):
+    if group is None:
+        return None
+    return {'slug': group.slug, 'title': group.title}
+
+
+def stats_data(user):
+    stats = getattr(user, 'stats', None)
+    return {
+        field: getattr(stats, field, 0)
+        for field in ('posts_count', 'followers_count', 'following_count')
+    }
+
+
+def thumbnails_data(image):
+    """Готовые миниатюры по алиасам; недостающие ставит в очередь."""
+    if not image:
+        return None
+    ready = {}
+    for alias in settings.POST_THUMBNAILS:
+        thumbnail = thumbnails.get_ready(image.name, alias)
+        if thumbnail is None:
+            thumbnails.schedule(image.name)
+        ready[alias] = thumbnail
+    return ready
+
+
+def image_data(post):
+    """Картинка с размерами и вариантами для srcset.
+
+    Старые, не обработанные при загрузке картинки отдаются
+    без размеров, но с миниатюрами из posts.thumbnails.
+    """
+    if not post.image:
+        return None
+    if not post.image_width:
+        return {'url': post.image.url,
+                'thumbnails': thumbnails_data(post.image)}
+    return {
+        'url': post.image.url,
+        'width': post.image_width,
+        'height': post.image_height,
+        'variants': [
+            {'url': default_storage.url(name), 'width': width,
+             'height': height}
+            for name, width, height in variants(
+                post.image.name, post.image_width, post.image_height
+            )
+        ],
+    }
+
+
+def post_data(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': author_data(post.author),
+        'group': group_data(post.group),
+        'image': image_data(post),
+    }
+
+
+def page_data(request, page):
+    """Страница курсорной пагинации со ссылками на соседние."""
+    def link(cursor):
+        return f'{request.path}?cursor={cursor}' if cursor else None
+
+    return {
+        'results': [post_data(post) for post in page],
+        'next': link(page.next_cursor),
+        'previous': link(page.previous_cursor),
+    }
@@ -0,0 +1,144 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Comment, Group, Post, User
+
+AUTHOR = 'Author'
+SLUG = 'slug'
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+
+
+@override_settings(PAGINATOR_CONST=2)
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=AUTHOR, first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug=SLUG, description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Текст {i}'
+            )
+            for i in range(3)
+        ]
+        cls.feeds = [
+            reverse('api:index'),
+            reverse('api:group_list', args=[SLUG]),
+            reverse('api:profile', args=[AUTHOR]),
+        ]
+        cls.urls = cls.feeds + [
+            reverse('api:post_detail', args=[cls.posts[0].pk]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_follow_cursor(self):
+        """Все посты обходятся по ссылкам next без повторов."""
+        for url in self.feeds:
+            with self.subTest(url=url):
+                seen = []
+                while url:
+                    data = self.client.get(url).json()
+                    seen += [post['id'] for post in data['results']]
+                    url = data['next']
+                self.assertEqual(
+                    seen, [post.pk for post in reversed(self.posts)]
+                )
+
+    def test_post_fields(self):
+        post = self.posts[0]
+        data = self.client.get(
+            reverse('api:post_detail', args=[post.pk])
+        ).json()
+        self.assertEqual(data['id'], post.pk)
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(
+            data['author'], {'username': AUTHOR, 'full_name': 'Имя Фамилия'}
+        )
+        self.assertEqual(data['group'], {'slug': SLUG, 'title': 'Группа'})
+        self.assertIsNone(data['image'])
+        self.assertEqual(data['comments_count'], 0)
+        data = self.client.get(reverse('api:profile', args=[AUTHOR])).json()
+        self.assertEqual(data['author']['posts_count'], 3)
+
+    def test_queries(self):
+        """Автор и группа приходят JOIN, повтор берётся из кеша."""
+        expected = {
+            reverse('api:index'): 1,
+            reverse('api:group_list', args=[SLUG]): 2,
+            reverse('api:profile', args=[AUTHOR]): 3,
+            reverse('api:post_detail', args=[self.posts[0].pk]): 1,
+        }
+        for url, queries in expected.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                with self.assertNumQueries(1 if 'profiles' in url else 0):
+                    self.client.get(url)
+
+    def test_etag(self):
+        """Повтор с ETag — 304; новый комментарий меняет ETag поста."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+        url = reverse('api:post_detail', args=[self.posts[0].pk])
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.posts[0], author=self.author, text='Комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments_count'], 1)
+
+    def test_etag_follows_thumbnails(self):
+        """Готовая миниатюра меняет ETag и тело вместо заглушки."""
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media_root, THUMBNAIL_WORKERS=0):
+            post = Post.objects.create(
+                author=self.author, text='Картинка',
+                image=SimpleUploadedFile('small.gif', SMALL_GIF),
+            )
+            url = reverse('api:post_detail', args=[post.pk])
+            response = self.client.get(url)
+            self.assertIsNone(
+                response.json()['image']['thumbnails']['card']
+            )
+            thumbnails.generate(post.image.name)
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['image']['thumbnails']['card'],
+            thumbnails.get_ready(post.image.name, 'card'),
+        )
+
+    def test_not_found(self):
+        for url in (reverse('api:group_list', args=['missing']),
+                    reverse('api:profile', args=['missing']),
+                    reverse('api:post_detail', args=[0])):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response['Content-Type'],
+                                 'application/json')
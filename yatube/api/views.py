@@ -0,0 +1,115 @@
+"""Read-only JSON API для мобильных клиентов.
+
+ETag ответа собирается из полного пути с курсором и версий кеша,
+которые сигналы меняют при записи, и версии миниатюр
+(posts.thumbnails.NAMESPACE). Поэтому повторный запрос с
+If-None-Match получает 304 без обращения к базе. Тело кешируется
+по пути — каждая страница ленты отдельно — через get_or_compute.
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+from django.views.decorators.http import require_safe
+
+from core.cache import get_or_compute, get_version
+from posts import conditions, thumbnails
+from posts.models import Group, Post, User
+from posts.paginators import CursorPaginator
+
+from .serializers import (author_data, group_data, page_data, post_data,
+                          stats_data)
+
+KEY = 'api:{}'
+
+
+def api_view(tags):
+    """JSON-ответ view с ETag, 304 и кешем тела.
+
+    tags(request, *args, **kwargs) — пространства имён версий, от
+    которых зависит ответ. Сам view возвращает словарь; Http404
+    превращается в JSON-ошибку.
+    """
+    def decorator(view):
+        @require_safe
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            path = request.get_full_path()
+            # Посты в ответах несут миниатюры (serializers.image_data).
+            namespaces = dict.fromkeys(
+                [*tags(request, *args, **kwargs), thumbnails.NAMESPACE]
+            )
+            version = ':'.join(
+                str(get_version(namespace)) for namespace in namespaces
+            )
+            etag = quote_etag(
+                hashlib.md5(f'{path}:{version}'.encode()).hexdigest()
+            )
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+
+            def build():
+                body = json.dumps(view(request, *args, **kwargs),
+                                  cls=DjangoJSONEncoder, ensure_ascii=False,
+                                  separators=(',', ':'))
+                return etag, body
+
+            try:
+                # Пока тело пересчитывается, другие запросы получают
+                # прежнее тело вместе с его ETag.
+                etag, body = get_or_compute(
+                    KEY.format(hashlib.md5(path.encode()).hexdigest()),
+                    build, settings.API_CACHE_TTL, version, name='api',
+                )
+            except Http404:
+                return JsonResponse({'detail': 'Не найдено'}, status=404)
+            response = HttpResponse(
+                body, content_type='application/json; charset=utf-8'
+            )
+            response['ETag'] = etag
+            patch_cache_control(response, public=True,
+                                max_age=settings.API_MAX_AGE)
+            return response
+        return wrapper
+    return decorator
+
+
+def cursor_page(request, queryset):
+    paginator = CursorPaginator(queryset, settings.PAGINATOR_CONST)
+    return page_data(
+        request, paginator.get_cursor_page(request.GET.get('cursor'))
+    )
+
+
+@api_view(conditions.feed_tags)
+def index(request):
+    return cursor_page(request, Post.objects.for_feed())
+
+
+@api_view(conditions.feed_tags)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return dict(group=group_data(group),
+                **cursor_page(request, group.posts.for_feed()))
+
+
+@api_view(conditions.profile_tags)
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    return dict(author=dict(author_data(author), **stats_data(author)),
+                **cursor_page(request, author.posts.for_feed()))
+
+
+@api_view(conditions.post_tags)
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.for_detail(), pk=post_id)
+    return dict(post_data(post), comments_count=post.comments_count)
@@ -0,0 +1,43 @@
+"""Файловый кеш с атомарными add и incr.
+
+FileBasedCache общий для процессов одной машины, но add и incr в нём —
+проверка и запись без блокировки: два воркера разом брали бы
+блокировку single-flight (core.cache.get_or_compute) или теряли сброс
+версии. Здесь обе операции идут под flock одного из LOCK_STRIPES
+файлов блокировки.
+
+BACKEND: core.backends.filebased.FileBasedCache.
+"""
+import fcntl
+import os
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+LOCK_STRIPES = 64
+LOCK_NAME = 'lock-{}.lock'
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    @contextmanager
+    def _locked(self, key, version):
+        stripe = zlib.crc32(
+            self.make_key(key, version).encode()
+        ) % LOCK_STRIPES
+        os.makedirs(self._dir, exist_ok=True)
+        # Файлы блокировок не оканчиваются на .djcache: clear и
+        # вытеснение их не трогают.
+        with open(os.path.join(self._dir, LOCK_NAME.format(stripe)),
+                  'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            yield
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked(key, version):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._locked(key, version):
+            return super().incr(key, delta, version)
@@ -0,0 +1,51 @@
+"""SQLite с профилем PRAGMA, BEGIN IMMEDIATE и повтором при блокировке.
+
+BEGIN IMMEDIATE — только у транзакций core.db.immediate(); обычный
+atomic начинается отложенным BEGIN и не ждёт писателей.
+
+ENGINE: core.backends.sqlite3, профиль — ключ PRAGMA_PROFILE в
+настройках базы (см. core.db.PROFILES).
+"""
+from django.db.backends.sqlite3 import base
+
+from core.db import apply_profile, call_with_retry
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    """Вне транзакции повторяет запрос, если база заблокирована.
+
+    Внутри транзакции повторять отдельный запрос нельзя: повторяется
+    весь блок (core.db.atomic_write).
+    """
+    database = None
+
+    def execute(self, query, params=None):
+        if self.database.in_atomic_block:
+            return super().execute(query, params)
+        return call_with_retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        if self.database.in_atomic_block:
+            return super().executemany(query, param_list)
+        return call_with_retry(super().executemany, query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    begin_immediate = False
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_profile(conn, self.settings_dict.get('PRAGMA_PROFILE'))
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.database = self
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        if not self.begin_immediate:
+            return super()._start_transaction_under_autocommit()
+        # Сразу берём блокировку записи: отложенный BEGIN, повышаясь
+        # до записи, получает SQLITE_BUSY мимо busy_timeout.
+        self.cursor().execute('BEGIN IMMEDIATE')
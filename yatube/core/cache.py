@@ -0,0 +1,126 @@
+import math
+import random
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import metrics
+
+VERSION_KEY = 'version:{}'
+STATS_KEY = 'cache_stats:{}:{}'
+LOCK_KEY = 'lock:{}'
+LOCK_POLL = 0.05
+
+# Запись get_or_compute: значение, версия данных, срок свежести
+# и сколько секунд значение считалось (для XFetch).
+Entry = namedtuple('Entry', 'value version expires delta')
+
+
+def get_version(namespace):
+    """Текущая версия пространства имён для ключей кеша."""
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Начинаем с метки времени, а не с единицы: если ключ версии
+        # вытеснят, старые фрагменты не совпадут с новой версией.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Инвалидирует все ключи на версии namespace; вернёт новую версию."""
+    key = VERSION_KEY.format(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+        return version
+
+
+def record_lookup(name, hit):
+    metrics.cache_lookup(hit)
+    key = STATS_KEY.format(name, 'hits' if hit else 'misses')
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_stats(name):
+    return {
+        kind: cache.get(STATS_KEY.format(name, kind), 0)
+        for kind in ('hits', 'misses')
+    }
+
+
+def _lookup(name, hit):
+    if name:
+        record_lookup(name, hit)
+    else:
+        metrics.cache_lookup(hit)
+
+
+def _fresh(entry, version, beta):
+    # XFetch: чем ближе срок и чем дольше пересчёт, тем вероятнее,
+    # что запрос обновит значение заранее, пока оно ещё свежее.
+    early = entry.delta * beta * -math.log(1 - random.random())
+    return entry.version == version and time.time() + early < entry.expires
+
+
+def lookup(key, version=None):
+    """Свежее значение key или None; ничего не вычисляет."""
+    entry = cache.get(key)
+    if isinstance(entry, Entry) and _fresh(entry, version, 0):
+        return entry.value
+    return None
+
+
+def get_or_compute(key, compute, timeout, version=None, name=None,
+                   beta=None):
+    """Значение key из кеша; пересчитывает compute() один воркер на ключ.
+
+    Значение свежее timeout секунд и пока совпадает version (например,
+    версия из get_version), но хранится ещё CACHE_STALE_TTL. Устаревшее
+    пересчитывает тот, кто взял блокировку, остальные получают старое.
+    Свежее с вероятностью XFetch обновляется заранее. Если значения
+    нет совсем, остальные ждут владельца блокировки до CACHE_LOCK_WAIT
+    секунд и только потом считают сами.
+    """
+    if beta is None:
+        beta = settings.CACHE_XFETCH_BETA
+    entry = cache.get(key)
+    if not isinstance(entry, Entry):
+        entry = None
+    if entry is not None and _fresh(entry, version, beta):
+        _lookup(name, True)
+        return entry.value
+    lock_key, token = LOCK_KEY.format(key), uuid.uuid4().hex
+    locked = cache.add(lock_key, token, settings.CACHE_LOCK_TTL)
+    if not locked:
+        if entry is not None:
+            _lookup(name, True)
+            return entry.value
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            entry = cache.get(key)
+            if isinstance(entry, Entry) and entry.version == version:
+                _lookup(name, True)
+                return entry.value
+    _lookup(name, False)
+    try:
+        start = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - start
+        cache.set(key, Entry(value, version, time.time() + timeout, delta),
+                  timeout + settings.CACHE_STALE_TTL)
+    finally:
+        if locked and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,22 @@
+"""Проверки настроек, на которых держится кеширование."""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register()
+def shared_cache(app_configs, **kwargs):
+    """Кеш по умолчанию должен быть общим для всех воркеров."""
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL:
+        return []
+    return [Warning(
+        'Кеш по умолчанию живёт в памяти процесса.',
+        hint=(
+            'Сброс версий core.cache, блокировка get_or_compute и граф '
+            'подписок видны только своему процессу: другие воркеры '
+            'отдают устаревшие фрагменты до конца их срока. Возьмите '
+            'core.backends.filebased.FileBasedCache или memcached.'
+        ),
+        id='core.W001',
+    )]
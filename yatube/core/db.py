@@ -0,0 +1,101 @@
+"""Профили SQLite и повтор операций при «database is locked»."""
+import functools
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, OperationalError, connections,
+                       transaction)
+
+# PRAGMA на каждое новое соединение. WAL пускает читателей параллельно
+# с писателем, busy_timeout заставляет ждать блокировку, а не падать.
+PROFILES = {
+    'default': {},
+    'development': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+    },
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+LOCKED_MESSAGES = (
+    'database is locked', 'database table is locked', 'database is busy',
+)
+
+
+def apply_profile(conn, name):
+    for pragma, value in PROFILES[name or 'default'].items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
+
+
+def is_locked(exc):
+    # «table is locked» — блокировка в общем кеше (in-memory базы тестов),
+    # busy_timeout её не ждёт.
+    return isinstance(exc, (sqlite3.OperationalError, OperationalError)) and (
+        any(message in str(exc) for message in LOCKED_MESSAGES)
+    )
+
+
+def backoff(attempt):
+    """Экспоненциальная пауза со случайным разбросом ±50%."""
+    return settings.SQLITE_LOCK_BACKOFF * 2 ** attempt * random.uniform(
+        0.5, 1.5
+    )
+
+
+def call_with_retry(func, *args, **kwargs):
+    retries = settings.SQLITE_LOCK_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as exc:
+            if attempt == retries or not is_locked(exc):
+                raise
+        time.sleep(backoff(attempt))
+
+
+@contextmanager
+def immediate(using=None):
+    """transaction.atomic, который в SQLite начинается с BEGIN IMMEDIATE.
+
+    Для блоков с записью: отложенный BEGIN, повышаясь от чтения до
+    записи, получает SQLITE_BUSY мимо busy_timeout. Блоки только с
+    чтением остаются обычным atomic и не ждут писателей.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    connection.begin_immediate = True
+    try:
+        with transaction.atomic(using):
+            connection.begin_immediate = False
+            yield
+    finally:
+        connection.begin_immediate = False
+
+
+def atomic_write(func, using=None):
+    """Вызывает func в immediate() и повторяет, если база заблокирована.
+
+    Повторяется только func, поэтому в ней должна быть лишь работа с
+    базой: разбор формы, обработка картинок и прочие побочные эффекты
+    остаются снаружи. Внутри чужой транзакции повтор невозможен, и
+    ошибка уходит наверх как есть.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        def run():
+            with immediate(using):
+                return func(*args, **kwargs)
+        if connections[using or DEFAULT_DB_ALIAS].in_atomic_block:
+            return run()
+        return call_with_retry(run)
+    return wrapper
@@ -0,0 +1,81 @@
+"""Чтение с реплик, запись и «свежее» чтение — с основной базы.
+
+После записи поток запроса читает только основную базу, а cookie
+PIN_COOKIE держит на ней пользователя ещё REPLICA_LAG_TOLERANCE
+секунд: так автор сразу видит свой пост. Реплика, отставшая больше
+допуска, из чтения выпадает.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+PRIMARY = 'default'
+PIN_COOKIE = 'primary_until'
+# Как часто (в секундах) процесс перепроверяет отставание реплик.
+CHECK_INTERVAL = 1
+
+_state = threading.local()
+_lags = {}
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах по последнему пульсу."""
+    from core.models import Heartbeat
+    beat = Heartbeat.objects.using(alias).values_list(
+        'beat', flat=True
+    ).first()
+    if beat is None:
+        return float('inf')
+    return (timezone.now() - beat).total_seconds()
+
+
+def fresh_replicas():
+    """Реплики, отставшие не больше REPLICA_LAG_TOLERANCE."""
+    now = time.monotonic()
+    replicas = []
+    for alias in settings.REPLICA_DATABASES:
+        checked, lag = _lags.get(alias, (None, None))
+        if checked is None or now - checked > CHECK_INTERVAL:
+            try:
+                lag = replica_lag(alias)
+            except Exception:
+                lag = float('inf')
+            _lags[alias] = (now, lag)
+        if lag <= settings.REPLICA_LAG_TOLERANCE:
+            replicas.append(alias)
+    return replicas
+
+
+def start_request(pinned):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def end_request():
+    """Завершает запрос; True, если в нём была запись."""
+    wrote = getattr(_state, 'wrote', False)
+    _state.pinned = _state.wrote = False
+    return wrote
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'pinned', False) or getattr(_state, 'wrote',
+                                                       False):
+            return PRIMARY
+        replicas = fresh_replicas()
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема приезжает на реплики вместе с данными.
+        return db not in settings.REPLICA_DATABASES
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.db import PROFILES, apply_profile, call_with_retry
+
+# Как было: журнал отката, отложенный BEGIN, без повторов —
+# против профиля с WAL, BEGIN IMMEDIATE и повтором.
+MODES = {
+    'default': {'immediate': False, 'retry': False},
+    'production': {'immediate': True, 'retry': True},
+}
+SCHEMA = (
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, post_id INTEGER, '
+    'text TEXT, created REAL)',
+    'CREATE INDEX comment_post_created ON comment (post_id, created)',
+)
+POSTS = 100
+
+
+def connect(path, profile):
+    conn = sqlite3.connect(path, isolation_level=None,
+                           check_same_thread=False)
+    apply_profile(conn, profile)
+    return conn
+
+
+def write_comment(conn, post_id, immediate):
+    """Как add_comment: чтение и запись в одной транзакции."""
+    conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+    try:
+        conn.execute('SELECT COUNT(*) FROM comment WHERE post_id = ?',
+                     [post_id]).fetchone()
+        conn.execute('INSERT INTO comment (post_id, text, created) '
+                     'VALUES (?, ?, ?)', [post_id, '-', time.time()])
+        conn.execute('COMMIT')
+    except sqlite3.Error:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def read_comments(conn, post_id):
+    conn.execute('SELECT * FROM comment WHERE post_id = ? '
+                 'ORDER BY created DESC LIMIT 20', [post_id]).fetchall()
+
+
+def worker(path, profile, stop, counts, lock, name, operation):
+    conn = connect(path, profile)
+    post_id = threading.get_ident() % POSTS
+    while time.monotonic() < stop:
+        try:
+            operation(conn, post_id)
+            result = name
+        except sqlite3.OperationalError:
+            result = 'errors'
+        with lock:
+            counts[result] += 1
+    conn.close()
+
+
+def run(path, profile, writers, readers, seconds):
+    """Гоняет писателей и читателей seconds секунд; вернёт счётчики."""
+    mode = MODES[profile]
+    setup = connect(path, profile)
+    for statement in SCHEMA:
+        setup.execute(statement)
+    setup.close()
+
+    def write(conn, post_id):
+        if mode['retry']:
+            call_with_retry(write_comment, conn, post_id, mode['immediate'])
+        else:
+            write_comment(conn, post_id, mode['immediate'])
+
+    counts = {'writes': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+    threads = [
+        threading.Thread(target=worker, args=[
+            path, profile, stop, counts, lock, name, operation,
+        ])
+        for name, operation, total in (('writes', write, writers),
+                                       ('reads', read_comments, readers))
+        for _ in range(total)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при параллельных '
+        'записи и чтении для профилей из core.db.PROFILES.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--profiles', nargs='+', choices=MODES,
+                            default=list(MODES))
+
+    def handle(self, *args, **options):
+        for profile in options['profiles']:
+            with tempfile.TemporaryDirectory() as directory:
+                counts = run(
+                    os.path.join(directory, 'bench.sqlite3'), profile,
+                    options['writers'], options['readers'],
+                    options['seconds'],
+                )
+            seconds = options['seconds']
+            pragmas = ', '.join(
+                f'{key}={value}' for key, value in PROFILES[profile].items()
+            ) or 'по умолчанию'
+            self.stdout.write(
+                f'{profile:12} записей/с {counts["writes"] / seconds:8.0f}  '
+                f'чтений/с {counts["reads"] / seconds:8.0f}  '
+                f'ошибок {counts["errors"]}  ({pragmas})'
+            )
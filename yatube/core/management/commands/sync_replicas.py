@@ -0,0 +1,58 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from core.db_router import PRIMARY
+from core.models import Heartbeat
+
+
+def beat():
+    Heartbeat.objects.using(PRIMARY).update_or_create(
+        pk=1, defaults={'beat': timezone.now()}
+    )
+
+
+def copy_sqlite(source, path):
+    """Копирует SQLite-базу целиком через backup API."""
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пишет пульс в основную базу и, если она SQLite, копирует её '
+        'в файлы реплик: локальная замена настоящей репликации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять каждые N секунд, пока не прервут.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.sync()
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self):
+        beat()
+        primary = connections[PRIMARY]
+        if primary.vendor != 'sqlite':
+            # Настоящая репликация сама довезёт пульс до реплик.
+            return
+        primary.ensure_connection()
+        for alias in settings.REPLICA_DATABASES:
+            copy_sqlite(
+                primary.connection, settings.DATABASES[alias]['NAME']
+            )
+            self.stdout.write(f'{alias}: синхронизирована')
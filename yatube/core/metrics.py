@@ -0,0 +1,200 @@
+"""Метрики запросов: SQL, шаблоны, кеш и миниатюры.
+
+Счётчики текущего запроса живут в threading.local, агрегаты —
+в гистограммах процесса, которые отдаются в текстовом формате
+Prometheus. Каждый процесс считает своё; складывает их Prometheus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+HELP = {
+    'yatube_request_seconds': 'Время обработки запроса по view.',
+    'yatube_sql_seconds': 'Суммарное время SQL за запрос.',
+    'yatube_sql_queries': 'Число SQL-запросов за запрос.',
+    'yatube_template_seconds': 'Время рендера шаблонов за запрос.',
+    'yatube_cache_lookups_total': 'Обращения к кешу: попадания и промахи.',
+    'yatube_thumbnail_seconds': 'Время построения миниатюр одной картинки.',
+}
+
+_local = threading.local()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def export(self):
+        """Все метрики в текстовом формате Prometheus 0.0.4."""
+        with self._lock:
+            histograms = sorted(
+                (key, list(h.counts), h.sum, h.count, h.buckets)
+                for key, h in self._histograms.items()
+            )
+            counters = sorted(self._counters.items())
+        lines, described = [], set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f'# HELP {name} {HELP.get(name, name)}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), counts, total, count, buckets in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, bucket in zip(buckets + ('+Inf',), counts):
+                cumulative += bucket
+                lines.append(
+                    f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+                )
+            lines.append(f'{name}_sum{_labels(labels)} {total}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """Накопители одного запроса."""
+    __slots__ = ('sql_count', 'sql_time', 'cache_hits', 'cache_misses',
+                 'timings')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timings = {}
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.sql_count += 1
+
+    def server_timing(self, total):
+        parts = [
+            f'sql;dur={self.sql_time * 1000:.2f};'
+            f'desc="{self.sql_count} queries"',
+        ]
+        parts.extend(
+            f'{name};dur={seconds * 1000:.2f}'
+            for name, seconds in self.timings.items()
+        )
+        parts.append(
+            f'cache;desc="hits={self.cache_hits} '
+            f'misses={self.cache_misses}"'
+        )
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+    def record(self, view, total):
+        registry.observe('yatube_request_seconds', total, view=view)
+        registry.observe('yatube_sql_seconds', self.sql_time, view=view)
+        registry.observe('yatube_sql_queries', self.sql_count,
+                         COUNT_BUCKETS, view=view)
+        registry.observe('yatube_template_seconds',
+                         self.timings.get('template', 0), view=view)
+        for result, value in (('hit', self.cache_hits),
+                              ('miss', self.cache_misses)):
+            if value:
+                registry.inc('yatube_cache_lookups_total', value,
+                             view=view, result=result)
+
+
+def start_request():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def end_request():
+    _local.metrics = None
+
+
+def current():
+    """Метрики текущего запроса; вне запроса (воркеры) — None."""
+    return getattr(_local, 'metrics', None)
+
+
+def cache_lookup(hit):
+    metrics = current()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def add_timing(name, seconds):
+    metrics = current()
+    if metrics is not None:
+        metrics.timings[name] = metrics.timings.get(name, 0) + seconds
+
+
+@contextmanager
+def timed(name):
+    """Добавляет время блока к метрике name текущего запроса."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(name, time.perf_counter() - start)
@@ -0,0 +1,151 @@
+import math
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from core import db_router, metrics, page_cache
+from core.cache import get_or_compute
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+CONDITIONAL_HEADERS = (
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+    'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE',
+)
+
+
+class MetricsMiddleware:
+    """Меряет запрос целиком и пишет итог в гистограммы по view.
+
+    Ставится первым в MIDDLEWARE, чтобы учесть остальные слои.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(
+                        request_metrics.sql_wrapper
+                    ))
+                response = self.get_response(request)
+        finally:
+            metrics.end_request()
+        total = time.perf_counter() - start
+        match = request.resolver_match
+        request_metrics.record(match.view_name if match else '-', total)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = request_metrics.server_timing(total)
+        return response
+
+
+class PrimaryPinMiddleware:
+    """Read-your-writes: после записи пользователь читает основную базу.
+
+    Небезопасные методы целиком идут в основную базу; запись в любом
+    запросе ставит cookie ещё на REPLICA_LAG_TOLERANCE секунд.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            until = float(request.COOKIES.get(db_router.PIN_COOKIE, 0))
+        except ValueError:
+            until = 0
+        db_router.start_request(
+            request.method not in SAFE_METHODS or until > time.time()
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = db_router.end_request()
+        if wrote and settings.REPLICA_DATABASES:
+            tolerance = settings.REPLICA_LAG_TOLERANCE
+            response.set_cookie(
+                db_router.PIN_COOKIE, str(time.time() + tolerance),
+                max_age=math.ceil(tolerance), httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт гостям готовые страницы view из core.page_cache.
+
+    Стоит до SessionMiddleware: попадание не трогает ни сессию, ни
+    базу, ни шаблоны. Запросы с cookie сессии или сообщений идут
+    мимо. Ответ, который ставит cookie (например, CSRF-токен формы),
+    не кешируется. У закешированного ответа нет Vary: Cookie, а
+    Cache-Control разрешает CDN держать его PAGE_CACHE_S_MAXAGE
+    секунд; запросы с cookie сессии CDN должна пропускать мимо кеша.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def cache_key(self, request):
+        if not settings.PAGE_CACHE_TTL or request.method != 'GET':
+            return None
+        if any(name in request.COOKIES for name in (
+            settings.SESSION_COOKIE_NAME, CookieStorage.cookie_name,
+        )):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        tags = getattr(match.func, 'page_cache_tags', None)
+        if tags is None:
+            return None
+        request.resolver_match = match
+        return page_cache.cache_key(
+            request, tags(request, *match.args, **match.kwargs)
+        )
+
+    def __call__(self, request):
+        cached = self.cache_key(request)
+        if cached is None:
+            return self.get_response(request)
+        key, version = cached
+        rendered = None
+
+        def render():
+            # Некешируемый ответ запоминается как None: такую
+            # страницу до смены версии рисуем без кеша. В кеш идёт
+            # полная страница, поэтому view не видит валидаторов
+            # клиента: иначе его 304 запомнился бы как некешируемый.
+            nonlocal rendered
+            conditions = {
+                name: request.META.pop(name)
+                for name in CONDITIONAL_HEADERS if name in request.META
+            }
+            try:
+                rendered = self.get_response(request)
+            finally:
+                request.META.update(conditions)
+            if not page_cache.cacheable(rendered):
+                return None
+            page_cache.make_public(rendered, settings.PAGE_CACHE_S_MAXAGE)
+            return rendered
+
+        response = get_or_compute(
+            key, render, settings.PAGE_CACHE_TTL, version, name='page'
+        )
+        if response is None:
+            return rendered or self.get_response(request)
+        return get_conditional_response(
+            request, response.get('ETag'),
+            parse_http_date_safe(response.get('Last-Modified', '')),
+            response,
+        ) or response
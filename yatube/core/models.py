@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class Heartbeat(models.Model):
+    """Метка времени, которую основная база пишет для оценки отставания.
+
+    Строка реплицируется вместе с данными: разница между текущим
+    временем и меткой на реплике и есть её отставание.
+    """
+    beat = models.DateTimeField('Метка')
+
+    class Meta:
+        verbose_name = 'Пульс репликации'
+        verbose_name_plural = 'Пульс репликации'
+
+    def __str__(self) -> str:
+        return self.beat.isoformat()
+
+
+class MediaFile(models.Model):
+    """Файл в хранилище по хешу содержимого и число ссылок на него.
+
+    Одинаковые загрузки ложатся в один файл; он удаляется, когда
+    последняя ссылающаяся запись отпускает его (core.storage.release
+    и collect).
+    """
+    name = models.CharField('Имя файла', max_length=255, primary_key=True)
+    refs = models.PositiveIntegerField('Ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+    def __str__(self) -> str:
+        return self.name
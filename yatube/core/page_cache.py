@@ -0,0 +1,59 @@
+"""Кеш целых страниц для гостей.
+
+View помечается cache_anonymous(tags), и запрос без сессии получает
+готовый ответ ещё до сессии, аутентификации, CSRF и самого view
+(core.middleware.AnonymousPageCacheMiddleware). Рядом со страницей
+хранятся версии её тегов из core.cache: после bump_version тега
+страницу перерисует один запрос, остальные пока получат прежнюю.
+"""
+import hashlib
+
+from django.utils.cache import patch_cache_control
+
+from .cache import get_version
+
+KEY = 'page:{}'
+
+
+def cache_anonymous(tags):
+    """Разрешает кешировать view для гостей.
+
+    tags(request, *args, **kwargs) возвращает пространства имён
+    версий, от которых зависит страница.
+    """
+    def decorator(view):
+        view.page_cache_tags = tags
+        return view
+    return decorator
+
+
+def cache_key(request, tags):
+    """Ключ страницы и версия её тегов для get_or_compute."""
+    path = f'{request.get_host()}:{request.get_full_path()}'
+    version = ':'.join(f'{tag}={get_version(tag)}' for tag in tags)
+    return KEY.format(hashlib.md5(path.encode()).hexdigest()), version
+
+
+def cacheable(response):
+    """Можно ли отдать этот ответ любому гостю."""
+    cache_control = response.get('Cache-Control', '')
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in cache_control
+        and 'no-store' not in cache_control
+    )
+
+
+def make_public(response, s_maxage):
+    """Ответ для общих кешей: без Vary: Cookie, живёт s_maxage на CDN."""
+    vary = [
+        header.strip() for header in response.get('Vary', '').split(',')
+        if header.strip() and header.strip().lower() != 'cookie'
+    ]
+    if vary:
+        response['Vary'] = ', '.join(vary)
+    elif response.has_header('Vary'):
+        del response['Vary']
+    patch_cache_control(response, public=True, max_age=0, s_maxage=s_maxage)
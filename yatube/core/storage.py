@@ -0,0 +1,172 @@
+"""Хранилище медиа с именами по хешу содержимого.
+
+Имя файла — <каталог upload_to>/<hh>/<sha256>.<расширение>, так что
+одинаковые картинки хранятся один раз, а URL никогда не меняет
+содержимое и может кешироваться навсегда (core.views.media). Ссылки
+на файл считает core.models.MediaFile: retain при сохранении записи,
+release при замене или удалении.
+
+Файл без ссылок удаляется, только если его не трогали дольше
+MEDIA_GC_GRACE секунд: _save обновляет mtime и у дубля, так что
+загрузка, которая ещё не дошла до retain, файл не потеряет. Такие
+файлы и загрузки из откатившихся транзакций подбирает collect —
+его по cron запускает команда collect_media.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+from .models import MediaFile
+
+ADDRESSED = re.compile(r'(^|/)([0-9a-f]{2})/\2[0-9a-f]{62}(\.\w+)?$')
+# Варианты по ширине (posts.images.variant_name) тоже не меняются.
+IMMUTABLE = re.compile(
+    r'(^|/)([0-9a-f]{2})/\2[0-9a-f]{62}(_\d+w)?(\.\w+)?$'
+)
+FILE_MODE = 0o644
+# Запас под лимит параметров SQLite в запросах ... IN (...).
+LOOKUP_CHUNK = 500
+
+
+def is_addressed(name):
+    return ADDRESSED.search(name) is not None
+
+
+def is_immutable(name):
+    return IMMUTABLE.search(name) is not None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, который называет файлы по SHA-256 содержимого.
+
+    Хеш считается по ходу записи во временный файл рядом с целью,
+    затем файл атомарно переименовывается. Если такой файл уже
+    есть, копия просто удаляется.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя всё равно выберет _save, а совпадение имён — это дубль.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=self.path(directory), suffix='.part'
+        )
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(descriptor, 'wb') as file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    file.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = posixpath.join(
+                directory, hexdigest[:2], hexdigest + extension
+            )
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(temp_path)
+                # Свежий mtime защищает файл от удаления до retain.
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or FILE_MODE)
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+def retain(name):
+    """Ещё одна запись ссылается на файл name."""
+    if not is_addressed(name):
+        return
+    if MediaFile.objects.filter(name=name).update(refs=F('refs') + 1):
+        return
+    try:
+        with transaction.atomic():
+            MediaFile.objects.create(name=name, refs=1)
+    except IntegrityError:
+        MediaFile.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def is_stale(storage, name, grace=None):
+    """Файл name есть и не обновлялся дольше grace секунд."""
+    if grace is None:
+        grace = settings.MEDIA_GC_GRACE
+    try:
+        return time.time() - os.path.getmtime(storage.path(name)) >= grace
+    except FileNotFoundError:
+        return False
+
+
+def delete(storage, name, on_delete=None):
+    storage.delete(name)
+    if on_delete is not None:
+        on_delete(name)
+
+
+def release(storage, name, on_delete=None):
+    """Запись больше не ссылается на name; последняя ссылка удаляет файл.
+
+    Файлы со старыми именами (до хранилища по хешу) не учитываются
+    и не удаляются. on_delete(name) вызывается после удаления файла.
+    Недавно загруженный файл остаётся до collect.
+    """
+    if not is_addressed(name):
+        return
+    MediaFile.objects.filter(name=name).update(refs=F('refs') - 1)
+    deleted, _ = MediaFile.objects.filter(name=name, refs__lte=0).delete()
+    if not deleted:
+        return
+
+    def delete_unused():
+        # Между release и фиксацией файл мог снова понадобиться.
+        if MediaFile.objects.filter(name=name).exists():
+            return
+        if is_stale(storage, name):
+            delete(storage, name, on_delete)
+
+    transaction.on_commit(delete_unused)
+
+
+def collect(storage, on_delete=None, grace=None):
+    """Удаляет файлы по хешу без ссылок, не тронутые дольше grace.
+
+    Возвращает имена удалённых файлов.
+    """
+    candidates = []
+    for root, _, files in os.walk(storage.location):
+        for file in files:
+            name = os.path.relpath(
+                os.path.join(root, file), storage.location
+            ).replace(os.sep, '/')
+            if is_addressed(name) and is_stale(storage, name, grace):
+                candidates.append(name)
+    deleted = []
+    for start in range(0, len(candidates), LOOKUP_CHUNK):
+        chunk = candidates[start:start + LOOKUP_CHUNK]
+        used = set(MediaFile.objects.filter(
+            name__in=chunk, refs__gt=0
+        ).values_list('name', flat=True))
+        for name in chunk:
+            if name not in used:
+                delete(storage, name, on_delete)
+                deleted.append(name)
+    return deleted
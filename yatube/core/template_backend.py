@@ -0,0 +1,27 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as backend
+
+from core import metrics
+
+
+class Template(backend.Template):
+    def render(self, context=None, request=None):
+        with metrics.timed('template'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(backend.DjangoTemplates):
+    """Стандартный бэкенд, который учитывает время рендера в метриках.
+
+    Меряются только шаблоны верхнего уровня: include внутри них
+    рендерятся движком напрямую и входят во время родителя.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            backend.reraise(exc, self)
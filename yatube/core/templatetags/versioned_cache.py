@@ -0,0 +1,56 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import get_or_compute, get_version
+
+register = template.Library()
+
+
+class VersionedCacheNode(template.Node):
+    def __init__(self, nodelist, expire_time, fragment_name, namespace,
+                 vary_on):
+        self.nodelist = nodelist
+        self.expire_time = expire_time
+        self.fragment_name = fragment_name
+        self.namespace = namespace
+        self.vary_on = vary_on
+
+    def render(self, context):
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            int(self.expire_time.resolve(context)),
+            version=':'.join(
+                str(get_version(namespace))
+                for namespace in self.namespace.split(',')
+            ),
+            name=self.fragment_name,
+        )
+
+
+@register.tag
+def versioned_cache(parser, token):
+    """Кеширует фрагмент до смены версии пространства имён.
+
+    {% versioned_cache timeout fragment_name namespace [var1 var2 ...] %}
+
+    Ключ строится по переменным, а версия namespace (несколько — через
+    запятую) хранится рядом с фрагментом: после bump_version его
+    перерисует один запрос, остальные до этого получат прежний
+    (core.cache.get_or_compute).
+    """
+    nodelist = parser.parse(('endversioned_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 4:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 3 arguments.'
+        )
+    return VersionedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        tokens[3],
+        [parser.compile_filter(t) for t in tokens[4:]],
+    )
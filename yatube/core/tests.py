@@ -1,4 +1,31 @@
-from django.test import TestCase
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from core import checks, db, db_router, page_cache, storage, views
+from core.backends import filebased
+from core.cache import LOCK_KEY, Entry, get_or_compute
+from core.management.commands import bench_sqlite
+from core.management.commands.sync_replicas import copy_sqlite
+from core.metrics import registry
+from core.middleware import PrimaryPinMiddleware
+from core.models import MediaFile
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +33,461 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        registry.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for part in ('sql;dur=', 'template;dur=', 'cache;desc=',
+                     'total;dur='):
+            with self.subTest(part=part):
+                self.assertIn(part, timing)
+
+    def test_per_view_histograms(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        text = registry.export()
+        self.assertIn('# TYPE yatube_request_seconds histogram', text)
+        self.assertIn(
+            'yatube_request_seconds_count{view="posts:index"} 2', text
+        )
+        self.assertIn(
+            'yatube_sql_queries_bucket{view="posts:index",le="+Inf"} 2', text
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_is_protected(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+@override_settings(REPLICA_DATABASES=['replica'], REPLICA_LAG_TOLERANCE=5)
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        db_router._lags.clear()
+        db_router.start_request(pinned=False)
+        self.router = db_router.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        db_router.end_request()
+        db_router._lags.clear()
+
+    def test_reads_go_to_fresh_replica(self):
+        with mock.patch.object(db_router, 'replica_lag', return_value=1):
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_lagging_replica_is_skipped(self):
+        with mock.patch.object(db_router, 'replica_lag', return_value=60):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_reads_after_write_stay_on_primary(self):
+        with mock.patch.object(db_router, 'replica_lag', return_value=1):
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def run_middleware(self, request, write=False):
+        reads = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        with mock.patch.object(db_router, 'replica_lag', return_value=1):
+            response = PrimaryPinMiddleware(view)(request)
+        return response, reads[0]
+
+    def test_write_pins_user_to_primary(self):
+        """После записи cookie держит пользователя на основной базе."""
+        response, read = self.run_middleware(
+            self.factory.post('/'), write=True
+        )
+        self.assertEqual(read, 'default')
+        cookie = response.cookies[db_router.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        request = self.factory.get('/')
+        request.COOKIES[db_router.PIN_COOKIE] = cookie.value
+        self.assertEqual(self.run_middleware(request)[1], 'default')
+        request.COOKIES[db_router.PIN_COOKIE] = str(time.time() - 1)
+        response, read = self.run_middleware(request)
+        self.assertEqual(read, 'replica')
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    def test_copy_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = sqlite3.connect(os.path.join(directory, 'a.sqlite3'))
+            source.execute('CREATE TABLE t (x)')
+            source.execute('INSERT INTO t VALUES (1)')
+            source.commit()
+            path = os.path.join(directory, 'b.sqlite3')
+            copy_sqlite(source, path)
+            source.close()
+            replica = sqlite3.connect(path)
+            self.assertEqual(
+                replica.execute('SELECT x FROM t').fetchall(), [(1,)]
+            )
+            replica.close()
+
+
+@override_settings(SQLITE_LOCK_RETRIES=2, SQLITE_LOCK_BACKOFF=0)
+class SQLiteLockTest(SimpleTestCase):
+    def test_retries_only_locked_errors(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise sqlite3.OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(db.call_with_retry(flaky), 'ok')
+        self.assertEqual(len(calls), 3)
+        broken = mock.Mock(side_effect=sqlite3.OperationalError('no table'))
+        with self.assertRaises(sqlite3.OperationalError):
+            db.call_with_retry(broken)
+        self.assertEqual(broken.call_count, 1)
+
+    def test_gives_up_after_retries(self):
+        locked = mock.Mock(
+            side_effect=sqlite3.OperationalError('database is locked')
+        )
+        with self.assertRaises(sqlite3.OperationalError):
+            db.call_with_retry(locked)
+        self.assertEqual(locked.call_count, 3)
+
+    def test_bench_profiles_have_no_lost_writes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            counts = bench_sqlite.run(
+                os.path.join(directory, 'bench.sqlite3'), 'production',
+                writers=2, readers=2, seconds=0.3,
+            )
+        self.assertEqual(counts['errors'], 0)
+        self.assertGreater(counts['writes'], 0)
+        self.assertGreater(counts['reads'], 0)
+
+
+class ImmediateTransactionTest(TransactionTestCase):
+    def begins(self, block):
+        statements = []
+
+        def log(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(log), block:
+            Post.objects.exists()
+        return [sql for sql in statements if sql.startswith('BEGIN')]
+
+    def test_only_write_blocks_take_write_lock(self):
+        self.assertEqual(self.begins(transaction.atomic()), ['BEGIN'])
+        self.assertEqual(self.begins(db.immediate()), ['BEGIN IMMEDIATE'])
+        self.assertEqual(self.begins(transaction.atomic()), ['BEGIN'])
+
+    @override_settings(SQLITE_LOCK_RETRIES=2, SQLITE_LOCK_BACKOFF=0)
+    def test_atomic_write_retries_only_the_block(self):
+        attempts = []
+
+        def write():
+            attempts.append(connection.in_atomic_block)
+            if len(attempts) < 3:
+                raise sqlite3.OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(db.atomic_write(write)(), 'ok')
+        self.assertEqual(attempts, [True, True, True])
+
+
+def run_on_commit(func):
+    func()
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = storage.ContentAddressedStorage(directory.name)
+
+    def test_identical_content_stored_once(self):
+        first = self.storage.save('posts/a.gif', ContentFile(b'data'))
+        second = self.storage.save('posts/b.GIF', ContentFile(b'data'))
+        self.assertEqual(first, second)
+        self.assertTrue(storage.is_addressed(first))
+        self.assertTrue(first.endswith('.gif'))
+        self.assertEqual(
+            os.listdir(os.path.dirname(self.storage.path(first))),
+            [os.path.basename(first)],
+        )
+        other = self.storage.save('posts/c.gif', ContentFile(b'other'))
+        self.assertNotEqual(other, first)
+
+    @override_settings(MEDIA_GC_GRACE=0)
+    @mock.patch('core.storage.transaction.on_commit', run_on_commit)
+    def test_last_release_deletes_file(self):
+        name = self.storage.save('posts/a.gif', ContentFile(b'data'))
+        storage.retain(name)
+        storage.retain(name)
+        storage.release(self.storage, name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(MediaFile.objects.get(name=name).refs, 1)
+        on_delete = mock.Mock()
+        storage.release(self.storage, name, on_delete)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(MediaFile.objects.exists())
+        on_delete.assert_called_once_with(name)
+
+    def test_legacy_names_are_not_counted(self):
+        storage.retain('posts/legacy.gif')
+        self.assertFalse(MediaFile.objects.exists())
+
+    @override_settings(MEDIA_GC_GRACE=60)
+    @mock.patch('core.storage.transaction.on_commit', run_on_commit)
+    def test_duplicate_upload_keeps_released_file(self):
+        """Дубль до своего retain не теряет файл, отпущенный другими."""
+        name = self.storage.save('posts/a.gif', ContentFile(b'data'))
+        path = self.storage.path(name)
+        os.utime(path, (0, 0))
+        storage.retain(name)
+        self.assertEqual(
+            self.storage.save('posts/b.gif', ContentFile(b'data')), name
+        )
+        storage.release(self.storage, name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(storage.collect(self.storage), [])
+        os.utime(path, (0, 0))
+        storage.retain(name)
+        self.assertEqual(storage.collect(self.storage), [])
+        self.assertTrue(self.storage.exists(name))
+
+    def test_collect_removes_stale_orphans(self):
+        orphan = self.storage.save('posts/a.gif', ContentFile(b'orphan'))
+        fresh = self.storage.save('posts/b.gif', ContentFile(b'fresh'))
+        legacy = 'posts/legacy.gif'
+        with open(self.storage.path(legacy), 'wb') as file:
+            file.write(b'old')
+        for name in (orphan, legacy):
+            os.utime(self.storage.path(name), (0, 0))
+        on_delete = mock.Mock()
+        self.assertEqual(
+            storage.collect(self.storage, on_delete, grace=60), [orphan]
+        )
+        on_delete.assert_called_once_with(orphan)
+        self.assertTrue(self.storage.exists(fresh))
+        self.assertTrue(self.storage.exists(legacy))
+
+
+@override_settings(DEBUG=True)
+class MediaViewTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = storage.ContentAddressedStorage(directory.name)
+        self.root = directory.name
+
+    def test_addressed_media_is_immutable(self):
+        name = self.storage.save('posts/a.gif', ContentFile(b'data'))
+        variant = name.replace('.gif', '_320w.gif')
+        legacy = 'posts/legacy.gif'
+        for path in (variant, legacy):
+            with open(self.storage.path(path), 'wb') as file:
+                file.write(b'data')
+        request = RequestFactory().get('/')
+        with self.settings(MEDIA_ROOT=self.root):
+            for path, immutable in (
+                (name, True), (variant, True), (legacy, False)
+            ):
+                with self.subTest(path=path):
+                    response = views.media(request, path)
+                    self.assertEqual(
+                        'immutable' in response.get('Cache-Control', ''),
+                        immutable,
+                    )
+
+
+@override_settings(PAGE_CACHE_TTL=60, PAGE_CACHE_S_MAXAGE=120)
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='slug', description='-'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст'
+        )
+        cls.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['slug']),
+            reverse('posts:profile', args=['author']),
+            reverse('posts:post_detail', args=[cls.post.pk]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_skips_database(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                queries = 1 if 'profile' in url else 0
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url)
+                self.assertIsNone(response.context)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage=120', response['Cache-Control'])
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                ).status_code, 304)
+
+    def test_revalidation_miss_caches_full_page(self):
+        """Промах на условном GET кладёт в кеш страницу, а не 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                cache.delete(page_cache.KEY.format(
+                    hashlib.md5(f'testserver:{url}'.encode()).hexdigest()
+                ))
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                ).status_code, 304)
+                queries = 1 if 'profile' in url else 0
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNone(response.context)
+
+    def test_tags_invalidate(self):
+        """Посты, комментарии и группы сбрасывают свои страницы."""
+        for url in self.urls:
+            self.client.get(url)
+        Post.objects.create(author=self.author, group=self.group,
+                            text='Новый пост')
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Новый комментарий')
+        self.group.title = 'Новая группа'
+        self.group.save()
+        for url, text in zip(self.urls, (
+            'Новый пост', 'Новая группа', 'Новый пост', 'Новый комментарий',
+        )):
+            with self.subTest(url=url):
+                self.assertIn(text, self.client.get(url).content.decode())
+
+    def test_logged_in_bypass(self):
+        url = self.urls[0]
+        self.client.get(url)
+        self.client.force_login(self.author)
+        response = self.client.get(url)
+        self.assertIsNotNone(response.context)
+        self.assertNotIn('public', response.get('Cache-Control', ''))
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    def test_process_local_cache_warns(self):
+        self.assertEqual(checks.shared_cache(None), [])
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            self.assertEqual(
+                [warning.id for warning in checks.shared_cache(None)],
+                ['core.W001'],
+            )
+
+
+class FileBasedCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = filebased.FileBasedCache(directory.name, {})
+
+    def run_threads(self, target, count=8):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_add_and_incr_are_atomic(self):
+        added = []
+        self.run_threads(lambda: added.append(self.cache.add('lock', 1)))
+        self.assertEqual(added.count(True), 1)
+        self.run_threads(lambda: [self.cache.incr('lock') for _ in range(5)])
+        self.assertEqual(self.cache.get('lock'), 41)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('lock'))
+
+
+@override_settings(CACHE_LOCK_WAIT=0.2, CACHE_XFETCH_BETA=0)
+class GetOrComputeTest(SimpleTestCase):
+    KEY = 'test:key'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_single_flight(self):
+        """Параллельные промахи считают значение один раз."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute(self.KEY, compute, 60)
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_stale_while_revalidate(self):
+        get_or_compute(self.KEY, lambda: 'old', 60, version=1)
+        cache.add(LOCK_KEY.format(self.KEY), 'other', 30)
+        self.assertEqual(
+            get_or_compute(self.KEY, lambda: 'new', 60, version=2), 'old'
+        )
+        cache.delete(LOCK_KEY.format(self.KEY))
+        self.assertEqual(
+            get_or_compute(self.KEY, lambda: 'new', 60, version=2), 'new'
+        )
+
+    def test_waits_for_lock_owner(self):
+        cache.add(LOCK_KEY.format(self.KEY), 'other', 30)
+        compute = mock.Mock(return_value='mine')
+
+        def owner_finishes(seconds):
+            cache.set(self.KEY, Entry('theirs', None, time.time() + 60, 0))
+
+        with mock.patch('core.cache.time.sleep', owner_finishes):
+            self.assertEqual(get_or_compute(self.KEY, compute, 60), 'theirs')
+        compute.assert_not_called()
+        cache.delete(self.KEY)
+        self.assertEqual(get_or_compute(self.KEY, compute, 60), 'mine')
+
+    @mock.patch('core.cache.random.random', return_value=0.5)
+    def test_early_refresh(self, random):
+        cache.set(self.KEY, Entry('old', None, time.time() + 10, 100))
+        self.assertEqual(
+            get_or_compute(self.KEY, lambda: 'new', 60, beta=0), 'old'
+        )
+        self.assertEqual(
+            get_or_compute(self.KEY, lambda: 'new', 60, beta=1), 'new'
+        )
@@ -1,4 +1,12 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.views.static import serve
+
+from core.metrics import registry
+from core.storage import is_immutable
 
 
 def page_not_found(request, exception):
@@ -15,3 +23,24 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики процесса для Prometheus: персоналу или по Bearer-токену."""
+    token = settings.METRICS_TOKEN
+    authorized = request.user.is_staff or token and constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    )
+    if not authorized:
+        raise PermissionDenied
+    return HttpResponse(
+        registry.export(), content_type='text/plain; version=0.0.4'
+    )
+
+
+def media(request, path):
+    """Файлы MEDIA_ROOT при DEBUG; имена по хешу кешируются навсегда."""
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_immutable(path):
+        response['Cache-Control'] = settings.MEDIA_CACHE_CONTROL
+    return response
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
 
 from .models import Group, Post, Comment, Follow
+from .search import fts_enabled, search_post_ids
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +18,19 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not fts_enabled():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        ids = [
+            pk for _, pk in search_post_ids(
+                search_term, posts_only=True,
+                limit=settings.ADMIN_SEARCH_LIMIT,
+            )
+        ]
+        return queryset.filter(pk__in=ids), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
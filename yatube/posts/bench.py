@@ -0,0 +1,245 @@
+"""Нагрузочный замер страниц posts на синтетических данных.
+
+Данные вставляются пачками через bulk_create, поэтому сигналы
+не срабатывают: ленты, счётчики и поисковый индекс пересобираются
+после вставки теми же функциями, что и в командах обслуживания.
+"""
+import itertools
+import math
+import random
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from . import counters, search, timeline
+from .follow_graph import graph
+from .models import Comment, Follow, Group, Post, User
+from .urls import app_name, urlpatterns
+
+# Вставка и переиндексация поиска идут пачками по BATCH_SIZE.
+BATCH_SIZE = 5000
+PERCENTILES = (50, 95, 99)
+# Маршруты, которые меняют данные даже по GET: их прогрев и повторы
+# меняли бы ленты и счётчики под остальными замерами.
+WRITES = ('add_comment', 'profile_follow', 'profile_unfollow')
+# Маршруты, которые открываются только автору поста.
+OWN_POST = ('post_edit',)
+WORDS = (
+    'лента пост группа автор подписка комментарий поиск страница '
+    'картинка текст новости погода город музыка кино книги спорт'
+).split()
+
+
+def zipf_weights(count, skew):
+    """Веса популярности: i-й по рангу получает 1 / (i + 1) ** skew."""
+    return [1 / (rank + 1) ** skew for rank in range(count)]
+
+
+def bulk_create(model, objects):
+    """bulk_create пачками: Django 2.2 сначала делает из objects список."""
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, BATCH_SIZE))
+        if not batch:
+            return
+        model.objects.bulk_create(batch)
+
+
+def seed(posts, users, groups, follows, comments, skew, rng=random):
+    """Заполняет пустую базу; популярность авторов распределена по Ципфу.
+
+    Возвращает словарь с размерами получившегося набора.
+    """
+    bulk_create(User, (
+        User(username=f'bench{i}', password='!') for i in range(users)
+    ))
+    user_ids = list(
+        User.objects.filter(username__startswith='bench')
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    bulk_create(Group, (
+        Group(title=f'Группа {i}', slug=f'bench-{i}', description='-')
+        for i in range(groups)
+    ))
+    group_ids = list(Group.objects.values_list('pk', flat=True)) or [None]
+    weights = zipf_weights(len(user_ids), skew)
+    authors = rng.choices(user_ids, weights, k=posts)
+    bulk_create(Post, (
+        Post(author_id=author_id, group_id=rng.choice(group_ids),
+             text=f'Пост {i} ' + ' '.join(rng.sample(WORDS, 8)))
+        for i, author_id in enumerate(authors)
+    ))
+    bulk_create(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in set(rng.choices(user_ids, weights, k=follows))
+        if author_id != user_id
+    ))
+    # Список id, а не открытый курсор: вставка идёт, пока его обходим.
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    bulk_create(Comment, (
+        Comment(post_id=post_id, author_id=rng.choice(user_ids),
+                text='Комментарий')
+        for post_id in post_ids
+        for _ in range(comments)
+    ))
+    counters.reconcile_all()
+    timeline.reconcile_heavy()
+    for user in User.objects.filter(follower__isnull=False).distinct():
+        timeline.rebuild(user)
+    graph.rebuild()
+    if search.fts_enabled():
+        search.rebuild(BATCH_SIZE)
+    return {
+        'posts': Post.objects.count(),
+        'users': len(user_ids),
+        'groups': Group.objects.count(),
+        'follows': Follow.objects.count(),
+        'comments': Comment.objects.count(),
+    }
+
+
+def route_urls(reader):
+    """URL маршрутов чтения posts, аргументы — у популярного автора.
+
+    Для OWN_POST берётся последний пост самого читателя.
+    """
+    author = User.objects.exclude(pk=reader.pk).order_by(
+        '-stats__followers_count'
+    ).first()
+    post = author.posts.order_by('-pub_date').first() or Post.objects.first()
+    own = reader.posts.order_by('-pub_date').first() or post
+    group = Group.objects.order_by('-posts_count').first()
+    values = {
+        'username': author.username,
+        'post_id': post.pk,
+        'slug': group.slug if group else 'missing',
+    }
+    urls = {}
+    for pattern in urlpatterns:
+        if pattern.name in WRITES:
+            continue
+        kwargs = {
+            name: values[name] for name in pattern.pattern.converters
+        }
+        if pattern.name in OWN_POST:
+            kwargs['post_id'] = own.pk
+        urls[pattern.name] = reverse(f'{app_name}:{pattern.name}',
+                                     kwargs=kwargs)
+    urls['search'] += f'?q={WORDS[0]}'
+    return urls
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def fetch(client, url):
+    """Ответ целиком: потоковое тело (выгрузки) читается до конца."""
+    response = client.get(url)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+class SQLTimer:
+    """execute_wrapper: число запросов и их время по perf_counter.
+
+    CaptureQueriesContext округляет время до миллисекунд, и быстрые
+    запросы давали ноль.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+def measure(client, url, repeat, warmup=1, cold=False):
+    """Перцентили времени, запросы и статус; errors — ответов не 2xx."""
+    timings, queries, sql_time = [], [], []
+    errors = 0
+    for _ in range(warmup):
+        fetch(client, url)
+    for _ in range(repeat):
+        if cold:
+            cache.clear()
+        timer = SQLTimer()
+        with connection.execute_wrapper(timer):
+            start = time.perf_counter()
+            response = fetch(client, url)
+            timings.append((time.perf_counter() - start) * 1000)
+        if not 200 <= response.status_code < 300:
+            errors += 1
+        queries.append(timer.count)
+        sql_time.append(timer.seconds * 1000)
+    result = {
+        f'p{percent}': round(percentile(timings, percent), 3)
+        for percent in PERCENTILES
+    }
+    result.update(
+        status=response.status_code,
+        errors=errors,
+        queries=max(queries),
+        sql_ms=round(sum(sql_time) / repeat, 3),
+    )
+    return result
+
+
+def run(repeat, warmup=1, cold=False):
+    """Замеряет каждый маршрут гостем и авторизованным читателем."""
+    # Читатель с постами: страницу правки открывает только автор.
+    readers = User.objects.order_by('-stats__following_count')
+    reader = readers.filter(stats__posts_count__gt=0).first() or readers[0]
+    authorized = Client()
+    authorized.force_login(reader)
+    clients = {'anonymous': Client(), 'authorized': authorized}
+    results = {}
+    for name, url in route_urls(reader).items():
+        for client_name, client in clients.items():
+            results[f'{name}:{client_name}'] = dict(
+                url=url, **measure(client, url, repeat, warmup, cold)
+            )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии относительно baseline: [(маршрут, метрика, было, стало)].
+
+    Время сравнивается по p95 с допуском tolerance (доля), число
+    запросов и ответов не 2xx — строго.
+    """
+    regressions = []
+    for route, current in results.items():
+        previous = baseline.get(route)
+        if previous is None:
+            continue
+        if current['p95'] > previous['p95'] * (1 + tolerance):
+            regressions.append(
+                (route, 'p95', previous['p95'], current['p95'])
+            )
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                (route, 'queries', previous['queries'], current['queries'])
+            )
+        # В прогонах до учёта статусов поля errors нет.
+        if current['errors'] > previous.get('errors', 0):
+            regressions.append(
+                (route, 'errors', previous.get('errors', 0),
+                 current['errors'])
+            )
+    return regressions
@@ -0,0 +1,68 @@
+"""Дешёвые валидаторы ETag для условных GET.
+
+ETag собирается из версий кеша (меняются сигналами при записи и
+лежат в общем для воркеров кеше, settings.CACHES) и состояния
+зрителя. Тяжёлые запросы страницы выполняются только при промахе.
+Last-Modified не отдаётся: правки, переименование
+группы, подписки и удаления не двигают никакую дату, и клиент с
+одним If-Modified-Since получил бы 304 на устаревшую страницу.
+"""
+import hashlib
+
+from core.cache import get_version
+
+from .models import User
+from .thumbnails import NAMESPACE as THUMBNAILS
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _viewer(request):
+    user = request.user
+    if not user.is_authenticated:
+        return ('anonymous',)
+    # CSRF-токен зашит в формы страницы: новый токен — новая версия.
+    return (user.pk, request.META.get('CSRF_COOKIE', ''),
+            get_version(f'follow:{user.pk}'))
+
+
+def _page_etag(request, *namespaces):
+    return _etag(*map(get_version, namespaces), request.get_full_path(),
+                 *_viewer(request))
+
+
+def feed_etag(request, *args, **kwargs):
+    # Карточки лент показывают миниатюры.
+    return _page_etag(request, 'posts', THUMBNAILS)
+
+
+def _author_id(username):
+    return User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+
+
+def profile_etag(request, username):
+    return _etag(feed_etag(request),
+                 get_version(f'followers:{_author_id(username)}'))
+
+
+def post_etag(request, post_id):
+    return _etag(_page_etag(request, 'posts'),
+                 get_version(f'comments:{post_id}'))
+
+
+# Теги для кеша гостевых страниц (core.page_cache): те же версии,
+# что и в ETag, но без состояния зрителя — он всегда гость.
+def feed_tags(request, **kwargs):
+    return ['posts', THUMBNAILS]
+
+
+def profile_tags(request, username):
+    return ['posts', THUMBNAILS, f'followers:{_author_id(username)}']
+
+
+def post_tags(request, post_id):
+    return ['posts', f'comments:{post_id}']
@@ -0,0 +1,70 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+# счётчик: (модель, по строкам которой считаем; поле-ссылка на владельца)
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+POST_COUNTERS = {'comments_count': (Comment, 'post')}
+GROUP_COUNTERS = {'posts_count': (Post, 'group')}
+
+
+def increment(queryset, **deltas):
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def change_user_stats(user_id, **deltas):
+    updated = increment(UserStats.objects.filter(user_id=user_id), **deltas)
+    if not updated and min(deltas.values()) > 0:
+        # Строки ещё нет: считаем её целиком, вместе с текущей записью.
+        reconcile_users(User.objects.filter(pk=user_id))
+
+
+def actual_count(model, lookup):
+    return Coalesce(Subquery(
+        model.objects.filter(**{lookup: OuterRef('pk')})
+        .order_by().values(lookup)
+        .annotate(count=Count('pk')).values('count'),
+        output_field=IntegerField(),
+    ), 0)
+
+
+def reconcile(queryset, counters):
+    """Исправляет расхождения счётчиков; возвращает число строк."""
+    fixed = 0
+    for field, (model, lookup) in counters.items():
+        drifted = queryset.annotate(
+            actual=actual_count(model, lookup)
+        ).exclude(**{field: F('actual')})
+        fixed += queryset.model.objects.filter(
+            pk__in=drifted.values('pk')
+        ).update(**{field: actual_count(model, lookup)})
+    return fixed
+
+
+def reconcile_users(users):
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=pk) for pk in
+            users.filter(stats__isnull=True).values_list('pk', flat=True)
+        ),
+        ignore_conflicts=True,
+    )
+    return reconcile(
+        UserStats.objects.filter(user__in=users), USER_COUNTERS
+    )
+
+
+def reconcile_all():
+    return {
+        'users': reconcile_users(User.objects.all()),
+        'posts': reconcile(Post.objects.all(), POST_COUNTERS),
+        'groups': reconcile(Group.objects.all(), GROUP_COUNTERS),
+    }
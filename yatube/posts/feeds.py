@@ -0,0 +1,153 @@
+"""RSS и Atom для ленты сайта, групп и авторов.
+
+Лента собирается одним запросом: посты с автором и группой
+через JOIN, а владелец ленты берётся из первого поста. Готовый
+ответ кешируется по версии posts через get_or_compute, поэтому опрос
+читалками почти не доходит до базы, а повтор с ETag получает 304.
+"""
+import functools
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import linebreaksbr, truncatewords
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import require_safe
+
+from core.cache import get_or_compute, get_version
+
+from .models import Group, Post, User
+
+KEY = 'feed:{}'
+
+Source = namedtuple('Source', 'owner posts')
+
+
+def cached(feed):
+    """View ленты с кешем ответа и условным GET по ETag/Last-Modified."""
+    @require_safe
+    @functools.wraps(feed)
+    def view(request, *args, **kwargs):
+        # Ссылки в ленте абсолютные, поэтому хост входит в ключ.
+        path = f'{request.get_host()}:{request.get_full_path()}'
+        version = get_version('posts')
+
+        def render():
+            response = feed(request, *args, **kwargs)
+            # Дата последнего поста не меняется от правок и удалений:
+            # валидатором служит только ETag по версии.
+            del response['Last-Modified']
+            response['ETag'] = quote_etag(
+                hashlib.md5(f'{version}:{path}'.encode()).hexdigest()
+            )
+            return response
+
+        # ETag хранится в самом ответе: пока лента пересчитывается,
+        # прежний ответ уходит со своим прежним ETag.
+        response = get_or_compute(
+            KEY.format(hashlib.md5(path.encode()).hexdigest()), render,
+            settings.FEED_CACHE_TTL, version, name='feed',
+        )
+        return get_conditional_response(
+            request, response['ETag'], response=response
+        ) or response
+    return view
+
+
+class PostsFeed(Feed):
+    """Последние посты сайта в RSS."""
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов.'
+
+    def latest(self, **filters):
+        return list(
+            Post.objects.for_feed().filter(**filters)
+            .order_by('-pub_date', '-pk')[:settings.FEED_ITEMS]
+        )
+
+    def get_object(self, request):
+        return Source(None, self.latest())
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self, source):
+        return source.posts
+
+    def item_title(self, post):
+        return truncatewords(post.text, 10)
+
+    def item_description(self, post):
+        return linebreaksbr(post.text)
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=[post.pk])
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_author_link(self, post):
+        return reverse('posts:profile', args=[post.author.username])
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else ()
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        posts = self.latest(group__slug=slug)
+        if posts:
+            return Source(posts[0].group, posts)
+        return Source(get_object_or_404(Group, slug=slug), posts)
+
+    def title(self, source):
+        return f'Yatube: группа {source.owner.title}'
+
+    def description(self, source):
+        return f'Новые записи группы {source.owner.title}.'
+
+    def link(self, source):
+        return reverse('posts:group_list', args=[source.owner.slug])
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        posts = self.latest(author__username=username)
+        if posts:
+            return Source(posts[0].author, posts)
+        return Source(get_object_or_404(User, username=username), posts)
+
+    def title(self, source):
+        return f'Yatube: записи {source.owner.username}'
+
+    def description(self, source):
+        return f'Новые записи автора {source.owner.username}.'
+
+    def link(self, source):
+        return reverse('posts:profile', args=[source.owner.username])
+
+
+class PostsAtomFeed(PostsFeed):
+    feed_type = Atom1Feed
+    subtitle = PostsFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, source):
+        return self.description(source)
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, source):
+        return self.description(source)
@@ -0,0 +1,156 @@
+"""Граф подписок в памяти процесса.
+
+Для каждого пользователя хранятся отсортированные массивы id авторов,
+на которых он подписан, и id его подписчиков. Запись помечена версией
+кеша (follow:<id> / followers:<id>), которую сбрасывают сигналы, а свои
+изменения после коммита вносятся в массив на месте. Версии лежат в
+общем для воркеров кеше (settings.CACHES, проверка core.W001), так что
+другие процессы перечитают массив при следующем обращении. Между
+записью и сбросом версии граф может на миг отставать, поэтому он
+годится лишь для чтения (кнопка подписки, лента), а запись полагается
+на ограничение unique_follow в базе.
+"""
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from core.cache import bump_version, get_version
+
+from .models import Follow
+
+FOLLOWING = 'follow'
+FOLLOWERS = 'followers'
+# Поле владельца массива и поле, id из которого в массиве лежат.
+FIELDS = {
+    FOLLOWING: ('user_id', 'author_id'),
+    FOLLOWERS: ('author_id', 'user_id'),
+}
+# Примерные накладные расходы на запись помимо самих id.
+ENTRY_OVERHEAD = 200
+
+
+def entry_size(ids):
+    return ENTRY_OVERHEAD + ids.itemsize * len(ids)
+
+
+class FollowGraph:
+    """LRU-кеш массивов подписок в пределах FOLLOW_GRAPH_BUDGET байт."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size
+
+    def following(self, user_id):
+        """Отсортированный массив id авторов, на которых подписан user."""
+        return self._get(FOLLOWING, user_id)
+
+    def followers(self, author_id):
+        return self._get(FOLLOWERS, author_id)
+
+    def is_following(self, user_id, author_id):
+        ids = self.following(user_id)
+        index = bisect_left(ids, author_id)
+        return index < len(ids) and ids[index] == author_id
+
+    def changed(self, user_id, author_id, followed):
+        """Подписка создана или удалена: вызывается из сигналов.
+
+        Версии сбрасываются сразу, а массивы правятся только после
+        коммита и только если за это время их никто не менял.
+        """
+        for namespace, owner, other in (
+            (FOLLOWING, user_id, author_id), (FOLLOWERS, author_id, user_id)
+        ):
+            ids = self._peek(namespace, owner)
+            version = bump_version(f'{namespace}:{owner}')
+            if ids is not None:
+                transaction.on_commit(partial(
+                    self._patch, namespace, owner, other, followed,
+                    ids, version
+                ))
+
+    def rebuild(self):
+        """Загружает граф целиком двумя проходами по Follow."""
+        self.clear()
+        for namespace, (owner_field, other_field) in FIELDS.items():
+            rows = Follow.objects.order_by(
+                owner_field, other_field
+            ).values_list(owner_field, other_field)
+            for owner, group in groupby(rows.iterator(), itemgetter(0)):
+                self._store(
+                    namespace, owner, get_version(f'{namespace}:{owner}'),
+                    array('q', (other for _, other in group)),
+                )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _peek(self, namespace, owner):
+        entry = self._entries.get((namespace, owner))
+        if entry is None or entry[0] != get_version(f'{namespace}:{owner}'):
+            return None
+        return entry[1]
+
+    def _get(self, namespace, owner):
+        version = get_version(f'{namespace}:{owner}')
+        key = (namespace, owner)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        owner_field, other_field = FIELDS[namespace]
+        ids = array('q', Follow.objects.filter(
+            **{owner_field: owner}
+        ).order_by(other_field).values_list(other_field, flat=True))
+        # Внутри транзакции могли прочитать ещё не закоммиченное:
+        # такой массив не кешируем, его могут откатить.
+        if not connection.in_atomic_block:
+            self._store(namespace, owner, version, ids)
+        return ids
+
+    def _patch(self, namespace, owner, other, followed, ids, version):
+        if get_version(f'{namespace}:{owner}') != version:
+            return
+        # Копия: старый массив могут читать в других потоках.
+        ids = array(ids.typecode, ids)
+        index = bisect_left(ids, other)
+        present = index < len(ids) and ids[index] == other
+        if followed and not present:
+            ids.insert(index, other)
+        elif not followed and present:
+            del ids[index]
+        self._store(namespace, owner, version, ids)
+
+    def _store(self, namespace, owner, version, ids):
+        budget = settings.FOLLOW_GRAPH_BUDGET
+        size = entry_size(ids)
+        if size > budget:
+            return
+        key = (namespace, owner)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= entry_size(old[1])
+            self._entries[key] = (version, ids)
+            self._size += size
+            while self._size > budget:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= entry_size(evicted)
+
+
+graph = FollowGraph()
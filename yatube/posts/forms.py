@@ -1,7 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
-
-from .models import Post, Comment
+from . import images
+from .models import Group, Post, Comment, User
 
 
 class PostForm(forms.ModelForm):
@@ -14,9 +15,68 @@ class PostForm(forms.ModelForm):
             "text": "Текст нового поста ",
         }
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            image = images.process(image)
+            self.instance.image_width = image.width
+            self.instance.image_height = image.height
+        elif not image:
+            self.instance.image_width = self.instance.image_height = None
+        return image
+
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit:
+            self.save_variants()
+        return post
+
+    def save_variants(self):
+        """Варианты новой картинки; зовётся после сохранения поста."""
+        if 'image' in self.changed_data and self.instance.image:
+            images.save_variants(self.instance.image.name)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
         help_texts = {'text': 'Текст комментария'}
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Запрос', max_length=200)
+    group = forms.ModelChoiceField(
+        Group.objects.all(), label='Группа', required=False,
+        to_field_name='slug',
+    )
+    author = forms.CharField(label='Автор', max_length=150, required=False)
+
+    def clean_author(self):
+        username = self.cleaned_data['author']
+        if not username:
+            return None
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise forms.ValidationError('Такого автора нет')
+        return author
+
+
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(
+        label='Формат', choices=[('csv', 'CSV'), ('jsonl', 'JSONL')],
+        required=False,
+    )
+    author = forms.CharField(label='Автор', max_length=150, required=False)
+    user = forms.CharField(label='Подписчик', max_length=150,
+                           required=False)
+    group = forms.SlugField(label='Группа', required=False)
+    since = forms.DateField(label='С даты', required=False)
+    until = forms.DateField(label='По дату', required=False)
+    gzip = forms.BooleanField(label='Сжать gzip', required=False)
+
+    def filters(self):
+        return {
+            name: self.cleaned_data[name]
+            for name in ('author', 'user', 'group') if self.cleaned_data[name]
+        }
@@ -0,0 +1,105 @@
+"""Обработка картинок постов при загрузке.
+
+Оригинал с телефона не хранится: картинка поворачивается по EXIF,
+ужимается до POST_IMAGE_MAX_SIZE, теряет метаданные и
+перекодируется. Рядом сохраняются варианты шириной из
+POST_IMAGE_WIDTHS, а размеры оригинала пишутся в пост, так что
+srcset собирается без обращения к хранилищу.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 6},
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+}
+
+
+def output_format(image):
+    """WebP, если Pillow собран с ним; иначе JPEG или PNG для прозрачных."""
+    if features.check('webp'):
+        return 'WEBP'
+    return 'PNG' if image.mode in ('RGBA', 'LA') else 'JPEG'
+
+
+def _encode(image, image_format):
+    buffer = io.BytesIO()
+    # Без параметра exif Pillow метаданные не пишет.
+    image.save(buffer, image_format, **SAVE_OPTIONS[image_format])
+    return buffer.getvalue()
+
+
+def process(upload):
+    """Перекодированная копия загрузки: ContentFile с width и height."""
+    with Image.open(upload) as source:
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((settings.POST_IMAGE_MAX_SIZE,) * 2, Image.LANCZOS)
+        transparent = image.mode in ('RGBA', 'LA', 'P') and (
+            'transparency' in image.info or image.mode != 'P'
+        )
+        image = image.convert('RGBA' if transparent else 'RGB')
+    image_format = output_format(image)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    processed = ContentFile(
+        _encode(image, image_format),
+        name=f'{stem}.{EXTENSIONS[image_format]}',
+    )
+    processed.width, processed.height = image.size
+    return processed
+
+
+def variant_name(name, width):
+    root, extension = os.path.splitext(name)
+    return f'{root}_{width}w{extension}'
+
+
+def variants(name, width, height):
+    """[(имя, ширина, высота)] вариантов картинки name размером width×height.
+
+    Берутся только ширины меньше оригинала: увеличивать незачем.
+    """
+    return [
+        (variant_name(name, size), size, round(height * size / width))
+        for size in settings.POST_IMAGE_WIDTHS if size < width
+    ]
+
+
+def save_variants(name):
+    """Пишет в хранилище уменьшенные копии сохранённой картинки name."""
+    with default_storage.open(name) as file, Image.open(file) as image:
+        image.load()
+    image_format = image.format
+    for target, width, height in variants(name, *image.size):
+        # Имя картинки — хеш содержимого, поэтому готовый вариант
+        # с тем же именем уже построен из этой же картинки.
+        if default_storage.exists(target):
+            continue
+        variant = image.resize((width, height), Image.LANCZOS)
+        default_storage.save(
+            target, ContentFile(_encode(variant, image_format))
+        )
+
+
+def delete_variants(name):
+    """Удаляет варианты name; каких нет — пропускает."""
+    for width in settings.POST_IMAGE_WIDTHS:
+        default_storage.delete(variant_name(name, width))
+
+
+def srcset(post):
+    """Строка srcset: варианты и сама картинка как самая широкая."""
+    candidates = [
+        f'{default_storage.url(name)} {width}w'
+        for name, width, _ in variants(
+            post.image.name, post.image_width, post.image_height
+        )
+    ]
+    candidates.append(f'{post.image.url} {post.image_width}w')
+    return ', '.join(candidates)
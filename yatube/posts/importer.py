@@ -0,0 +1,322 @@
+"""Загрузка пользователей, групп, постов и комментариев из архива JSONL.
+
+Строка архива — объект с полем type (по умолчанию post)::
+
+    {"type": "user", "username": "leo", "first_name": "Лев",
+     "last_name": "", "email": "leo@example.com"}
+    {"type": "group", "slug": "cats", "title": "Кошки",
+     "description": ""}
+    {"type": "post", "author": "leo", "group": "cats", "text": "...",
+     "pub_date": "2021-05-01T12:00:00+03:00", "image": "img/1.jpg",
+     "comments": [{"author": "tom", "text": "...",
+                   "created": "2021-05-02T08:00:00+03:00"}]}
+
+Файл (можно .gz) читается потоком пачками по batch_size строк. Пачка
+пишется через bulk_create одной транзакцией вместе с
+ImportCheckpoint, поэтому прерванная загрузка продолжается с первой
+незафиксированной строки. В памяти — только пачка и словари
+username → id и slug → id; незнакомые авторы и группы заводятся
+пачкой. Сигналы при bulk_create не срабатывают: счётчики и ленты
+пересобираются в конце, поисковый индекс ведут триггеры FTS.
+"""
+import gzip
+import itertools
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache import bump_version
+from core.db import immediate
+from core.storage import retain
+
+from . import counters, images, search, timeline
+from .models import Comment, Follow, Group, ImportCheckpoint, Post, User
+
+# Запас под лимит параметров SQLite в запросах ... IN (...).
+LOOKUP_CHUNK = 500
+
+
+def open_archive(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_batches(file, batch_size):
+    """(смещение после пачки, записи пачки) с текущей позиции file."""
+    offset = file.tell()
+    batch = []
+    for line in file:
+        offset += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            batch.append(json.loads(line))
+        except ValueError as error:
+            raise ValueError(f'Смещение {offset}: {error}') from None
+        if len(batch) >= batch_size:
+            yield offset, batch
+            batch = []
+    if batch:
+        yield offset, batch
+
+
+def lookup(queryset, field, values):
+    """{значение field: pk} для values, запросами по LOOKUP_CHUNK."""
+    values = list(values)
+    found = {}
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        found.update(queryset.filter(
+            **{f'{field}__in': values[start:start + LOOKUP_CHUNK]}
+        ).values_list(field, 'pk'))
+    return found
+
+
+def parse_date(value, default):
+    if not value:
+        return default
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Неверная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+@contextmanager
+def archive_dates():
+    """auto_now и auto_now_add не перетирают даты из архива."""
+    flags = [
+        (Post._meta.get_field('pub_date'), 'auto_now_add'),
+        (Post._meta.get_field('updated'), 'auto_now'),
+        (Comment._meta.get_field('created'), 'auto_now_add'),
+    ]
+    saved = [getattr(field, flag) for field, flag in flags]
+    for field, flag in flags:
+        setattr(field, flag, False)
+    try:
+        yield
+    finally:
+        for (field, flag), value in zip(flags, saved):
+            setattr(field, flag, value)
+
+
+def post_ids():
+    """id для новых постов; None — их вернёт сам bulk_create.
+
+    SQLite в Django 2.2 id из bulk_create не возвращает, поэтому они
+    раздаются заранее: пачка пишется в core.db.immediate(), которая
+    держит запись с самого начала. Как и AUTOINCREMENT, id удалённых
+    постов повторно не выдаются.
+    """
+    if connection.features.can_return_ids_from_bulk_insert:
+        return itertools.repeat(None)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT seq FROM sqlite_sequence WHERE name = %s',
+                [Post._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return itertools.count((row[0] if row else 0) + 1)
+    return itertools.count(
+        (Post.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+    )
+
+
+class Importer:
+    def __init__(self, path, media_root=None, batch_size=1000,
+                 stdout=None):
+        self.path = path
+        self.source = os.path.abspath(path)
+        self.media_root = media_root or os.path.dirname(self.source)
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.users = {}
+        self.groups = {}
+        self.authors = set()
+        # Смещение начала пачки, которая загружается сейчас.
+        self.position = 0
+        self.totals = dict.fromkeys(
+            ('users', 'groups', 'posts', 'comments', 'images'), 0
+        )
+
+    def write(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def run(self, restart=False):
+        """Загружает архив с отметки и пересобирает производные данные."""
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            source=self.source
+        )
+        if restart:
+            checkpoint.offset = 0
+        # После перезапуска неизвестно, чьи посты уже загружены.
+        resumed = checkpoint.offset > 0
+        size = os.path.getsize(self.path)
+        start = time.perf_counter()
+        lines = 0
+        self.position = checkpoint.offset
+        with open_archive(self.path) as file, archive_dates():
+            file.seek(checkpoint.offset)
+            for offset, records in read_batches(file, self.batch_size):
+                self.load(records, offset)
+                self.position = offset
+                lines += len(records)
+                position = getattr(file, 'fileobj', file).tell()
+                self.write(
+                    f'{position * 100 // max(size, 1)}%: строк {lines}, '
+                    f'постов {self.totals["posts"]}, комментариев '
+                    f'{self.totals["comments"]}, '
+                    f'{lines / (time.perf_counter() - start):.0f} строк/с'
+                )
+        self.finish(resumed)
+        return self.totals
+
+    def load(self, records, offset):
+        kinds = {'user': [], 'group': [], 'post': []}
+        for record in records:
+            kind = record.get('type', 'post')
+            if kind not in kinds:
+                raise ValueError(f'Неизвестный тип записи: {kind}')
+            kinds[kind].append(record)
+        posts = kinds['post']
+        # Файлы не откатываются с транзакцией; имя по хешу содержимого
+        # при повторе пачки указывает на тот же файл, а если повтора
+        # не будет, файл без ссылок удалит core.storage.collect.
+        attached = [self.attach(record.get('image')) for record in posts]
+        try:
+            with immediate():
+                self.resolve_users(kinds['user'], posts)
+                self.resolve_groups(kinds['group'], posts)
+                self.create_posts(posts, attached)
+                ImportCheckpoint.objects.filter(source=self.source).update(
+                    offset=offset
+                )
+        except Exception:
+            # Словари могли получить id из отменённой транзакции.
+            self.users.clear()
+            self.groups.clear()
+            raise
+        self.authors.update(self.users[record['author']] for record in posts)
+
+    def attach(self, relative):
+        """(имя, ширина, высота) обработанной картинки или None."""
+        if not relative:
+            return None
+        path = os.path.join(self.media_root, relative)
+        try:
+            with open(path, 'rb') as file:
+                processed = images.process(File(file, name=relative))
+        except OSError as error:
+            self.write(f'Картинка пропущена: {relative}: {error}')
+            return None
+        field = Post._meta.get_field('image')
+        name = field.storage.save(
+            field.generate_filename(None, processed.name), processed
+        )
+        images.save_variants(name)
+        self.totals['images'] += 1
+        return name, processed.width, processed.height
+
+    def resolve_users(self, records, posts):
+        details = {record['username']: record for record in records}
+        names = set(details)
+        for record in posts:
+            names.add(record['author'])
+            names.update(
+                comment['author'] for comment in record.get('comments', ())
+            )
+        missing = names - self.users.keys()
+        if not missing:
+            return
+        self.users.update(lookup(User.objects, 'username', missing))
+        new = missing - self.users.keys()
+        User.objects.bulk_create(
+            User(username=name, password='!',
+                 first_name=details.get(name, {}).get('first_name', ''),
+                 last_name=details.get(name, {}).get('last_name', ''),
+                 email=details.get(name, {}).get('email', ''))
+            for name in new
+        )
+        self.users.update(lookup(User.objects, 'username', new))
+        self.totals['users'] += len(new)
+
+    def resolve_groups(self, records, posts):
+        details = {record['slug']: record for record in records}
+        slugs = set(details)
+        slugs.update(record['group'] for record in posts
+                     if record.get('group'))
+        missing = slugs - self.groups.keys()
+        if not missing:
+            return
+        self.groups.update(lookup(Group.objects, 'slug', missing))
+        new = missing - self.groups.keys()
+        Group.objects.bulk_create(
+            Group(slug=slug,
+                  title=details.get(slug, {}).get('title', slug),
+                  description=details.get(slug, {}).get('description', ''))
+            for slug in new
+        )
+        self.groups.update(lookup(Group.objects, 'slug', new))
+        self.totals['groups'] += len(new)
+
+    def create_posts(self, records, attached):
+        if not records:
+            return
+        now = timezone.now()
+        posts = []
+        for pk, record, image in zip(post_ids(), records, attached):
+            pub_date = parse_date(record.get('pub_date'), now)
+            name, width, height = image or ('', None, None)
+            posts.append(Post(
+                pk=pk, text=record['text'], pub_date=pub_date,
+                updated=pub_date, author_id=self.users[record['author']],
+                group_id=self.groups.get(record.get('group')),
+                image=name, image_width=width, image_height=height,
+            ))
+        Post.objects.bulk_create(posts)
+        comments = [
+            Comment(post_id=post.pk, author_id=self.users[comment['author']],
+                    text=comment['text'],
+                    created=parse_date(comment.get('created'), post.pub_date))
+            for post, record in zip(posts, records)
+            for comment in record.get('comments', ())
+        ]
+        Comment.objects.bulk_create(comments)
+        for post in posts:
+            if post.image:
+                retain(post.image.name)
+        self.totals['posts'] += len(posts)
+        self.totals['comments'] += len(comments)
+
+    def finish(self, resumed):
+        """Пересобирает счётчики, ленты подписчиков и кеши страниц."""
+        self.write('Пересчёт счётчиков…')
+        counters.reconcile_all()
+        timeline.reconcile_heavy()
+        follows = Follow.objects.values_list('user_id', flat=True)
+        if resumed:
+            readers = set(follows)
+        else:
+            readers = set()
+            authors = list(self.authors)
+            for start in range(0, len(authors), LOOKUP_CHUNK):
+                readers.update(follows.filter(
+                    author_id__in=authors[start:start + LOOKUP_CHUNK]
+                ))
+        self.write(f'Пересборка лент: {len(readers)}')
+        for pk in readers:
+            timeline.rebuild(User(pk=pk))
+        if search.fts_enabled():
+            search.optimize()
+        bump_version('posts')
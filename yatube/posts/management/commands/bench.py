@@ -0,0 +1,101 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from posts import bench
+
+SIZES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+
+
+class Command(BaseCommand):
+    help = (
+        'Засевает тестовую базу синтетическими данными и замеряет '
+        'время и SQL-запросы каждой страницы posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES, default='1k')
+        parser.add_argument('--posts', type=int,
+                            help='Число постов вместо --size.')
+        parser.add_argument('--users', type=int,
+                            help='По умолчанию — автор на 20 постов.')
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Подписок на читателя до удаления дублей.')
+        parser.add_argument('--comments', type=int, default=1,
+                            help='Комментариев на пост.')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель Ципфа для популярности.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кеш перед каждым запросом.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда записать JSON.')
+        parser.add_argument('--baseline',
+                            help='JSON прошлого прогона для сравнения.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Допустимый рост p95, доля.')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        posts = options['posts'] or SIZES[options['size']]
+        users = options['users'] or max(10, posts // 20)
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)['routes']
+        # Замер идёт в отдельной тестовой базе: рабочие данные
+        # не трогаем, а база всегда начинается пустой.
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment(debug=False)
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write(f'Засев: {posts} постов, {users} авторов')
+            dataset = bench.seed(
+                posts, users, options['groups'], options['follows'],
+                options['comments'], options['skew'],
+                random.Random(options['seed']),
+            )
+            routes = bench.run(
+                options['repeat'], options['warmup'], options['cold']
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        for route, result in routes.items():
+            line = (
+                f'{route:32} {result["status"]} '
+                f'p50={result["p50"]:.1f} p95={result["p95"]:.1f} '
+                f'p99={result["p99"]:.1f} мс, '
+                f'запросов {result["queries"]}, SQL {result["sql_ms"]:.1f} мс'
+            )
+            if result['errors']:
+                line = self.style.WARNING(
+                    f'{line}, не 2xx: {result["errors"]}'
+                )
+            self.stdout.write(line)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(
+                    {'dataset': dataset, 'options': {
+                        key: options[key] for key in
+                        ('repeat', 'warmup', 'cold', 'skew', 'seed')
+                    }, 'routes': routes},
+                    file, ensure_ascii=False, indent=2,
+                )
+        if baseline is None:
+            return
+        regressions = bench.compare(routes, baseline, options['tolerance'])
+        for route, metric, before, after in regressions:
+            self.stdout.write(
+                self.style.WARNING(f'{route}: {metric} {before} -> {after}')
+            )
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'Регрессий: {len(regressions)}')
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.storage import collect
+from posts import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов без ссылок, не тронутые дольше '
+        'MEDIA_GC_GRACE, вместе с вариантами. Запускайте по cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE,
+            help='Сколько секунд файл без ссылок ещё хранится.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = collect(
+            Post.image.field.storage, images.delete_variants,
+            options['grace'],
+        )
+        for name in deleted:
+            self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов без ссылок: {len(deleted)}'
+        ))
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core.cache import bump_version
+from core.models import MediaFile
+from core.storage import collect, is_addressed
+from posts import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Переименовывает картинки постов по хешу содержимого, '
+        'сливает дубли, пересчитывает ссылки на файлы и удаляет '
+        'файлы без ссылок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать, что будет сделано.')
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct()
+        legacy = [name for name in names if not is_addressed(name)]
+        self.stdout.write(f'Картинок по старым именам: {len(legacy)}')
+        if options['dry_run']:
+            return
+        for name in legacy:
+            if not storage.exists(name):
+                self.stdout.write(self.style.WARNING(f'Нет файла: {name}'))
+                continue
+            with storage.open(name) as file:
+                addressed = storage.save(name, file)
+            Post.objects.filter(image=name).update(image=addressed)
+            if Post.objects.filter(
+                image=addressed, image_width__isnull=False
+            ).exists():
+                images.save_variants(addressed)
+                images.delete_variants(name)
+            storage.delete(name)
+            self.stdout.write(f'{name} -> {addressed}')
+        refs = Post.objects.exclude(image='').order_by().values(
+            'image'
+        ).annotate(refs=Count('pk')).values_list('image', 'refs')
+        with transaction.atomic():
+            MediaFile.objects.all().delete()
+            MediaFile.objects.bulk_create(
+                MediaFile(name=name, refs=count)
+                for name, count in refs if is_addressed(name)
+            )
+        bump_version('posts')
+        # Файлы без ссылок: недавние на момент release и загрузки из
+        # откатившихся транзакций (ошибки формы, сбойные пачки импорта).
+        orphans = collect(storage, images.delete_variants)
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов в учёте: {MediaFile.objects.count()}, '
+            f'удалено без ссылок: {len(orphans)}'
+        ))
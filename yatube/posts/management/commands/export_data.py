@@ -0,0 +1,54 @@
+import datetime as dt
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exports
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии или подписки в CSV или JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('output', help='Файл; «-» — stdout.')
+        parser.add_argument('--format', choices=sorted(exports.LINES),
+                            default='csv')
+        parser.add_argument('--author', help='username автора.')
+        parser.add_argument('--user', help='username подписчика.')
+        parser.add_argument('--group', help='slug группы.')
+        parser.add_argument('--since', type=dt.date.fromisoformat,
+                            help='С даты ГГГГ-ММ-ДД включительно.')
+        parser.add_argument('--until', type=dt.date.fromisoformat,
+                            help='По дату ГГГГ-ММ-ДД включительно.')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        filters = {
+            name: options[name] for name in ('author', 'user', 'group')
+            if options[name]
+        }
+        try:
+            content = exports.stream(
+                options['dataset'], options['format'], filters,
+                options['since'], options['until'], options['gzip'],
+                options['chunk_size'],
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        if options['output'] == '-':
+            self.write(sys.stdout.buffer, content)
+            return
+        with open(options['output'], 'wb') as file:
+            size = self.write(file, content)
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["output"]}: {size} байт'
+        ))
+
+    def write(self, file, content):
+        size = 0
+        for chunk in content:
+            file.write(chunk)
+            size += len(chunk)
+        return size
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DataError, IntegrityError
+
+from posts.importer import Importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает пользователей, группы, посты и комментарии из архива '
+        'JSONL; прерванная загрузка продолжается с последней пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .jsonl.gz.')
+        parser.add_argument(
+            '--media-root',
+            help='Откуда брать картинки; по умолчанию — папка архива.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с начала файла, забыв отметку.',
+        )
+
+    def handle(self, *args, **options):
+        importer = Importer(
+            options['path'], options['media_root'], options['batch_size'],
+            self.stdout,
+        )
+        try:
+            totals = importer.run(options['restart'])
+        except (OSError, KeyError, ValueError, IntegrityError,
+                DataError) as error:
+            raise CommandError(
+                f'Загрузка остановлена на пачке со смещения '
+                f'{importer.position}: {error!r}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Загружено: ' + ', '.join(
+                f'{name} {count}' for name, count in totals.items()
+            )
+        ))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Переиндексирует посты и комментарии для полнотекстового поиска.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.SEARCH_REBUILD_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Очистить индекс перед переиндексацией.',
+        )
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            raise CommandError('Индекс FTS5 недоступен для этой базы.')
+        total = search.rebuild(
+            options['batch_size'], options['clear'], self.stdout
+        )
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано: {total}'))
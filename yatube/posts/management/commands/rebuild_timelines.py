@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts.models import User
+from posts.timeline import rebuild, reconcile_heavy
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пересобрать только ленты этих пользователей.',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(follower__isnull=False) | Q(timeline__isnull=False)
+        ).distinct()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        reconcile_heavy()
+        count = 0
+        for user in users.iterator():
+            rebuild(user)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Лент пересобрано: {count}'))
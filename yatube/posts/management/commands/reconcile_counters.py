@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile_all
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с таблицами и чинит их.'
+
+    def handle(self, *args, **options):
+        for name, fixed in reconcile_all().items():
+            self.stdout.write(f'{name}: исправлено {fixed}')
+        self.stdout.write(self.style.SUCCESS('Счётчики сверены'))
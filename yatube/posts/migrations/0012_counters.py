@@ -0,0 +1,73 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserStats = apps.get_model('posts', 'UserStats')
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    Follow = apps.get_model('posts', 'Follow')
+    Comment = apps.get_model('posts', 'Comment')
+    stats = {pk: UserStats(user_id=pk)
+             for pk in User.objects.values_list('pk', flat=True)}
+    counters = [
+        (Post, 'author', 'posts_count'),
+        (Follow, 'author', 'followers_count'),
+        (Follow, 'user', 'following_count'),
+    ]
+    for model, lookup, field in counters:
+        rows = model.objects.order_by().values(lookup).annotate(
+            count=Count('pk'))
+        for row in rows:
+            setattr(stats[row[lookup]], field, row['count'])
+    UserStats.objects.bulk_create(stats.values(), batch_size=500)
+    rows = Comment.objects.order_by().values('post').annotate(
+        count=Count('pk'))
+    for row in rows:
+        Post.objects.filter(pk=row['post']).update(
+            comments_count=row['count'])
+    rows = Post.objects.exclude(group=None).order_by().values(
+        'group').annotate(count=Count('pk'))
+    for row in rows:
+        Group.objects.filter(pk=row['group']).update(
+            posts_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+            options={
+                'verbose_name': 'Счётчики пользователя',
+                'verbose_name_plural': 'Счётчики пользователей',
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Число постов'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Число комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
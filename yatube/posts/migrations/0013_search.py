@@ -0,0 +1,79 @@
+from django.db import migrations
+
+TABLE = 'posts_search'
+# Посты лежат в индексе под rowid = id * 2, комментарии — id * 2 + 1:
+# так триггеры находят свою строку по rowid, без сканирования.
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE {TABLE} USING fts5(
+        text, post_id UNINDEXED, tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {TABLE}_post_ai AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {TABLE}(rowid, text, post_id)
+        VALUES (new.id * 2, new.text, new.id);
+    END""",
+    f"""CREATE TRIGGER {TABLE}_post_au AFTER UPDATE OF text ON posts_post
+    BEGIN
+        UPDATE {TABLE} SET text = new.text WHERE rowid = new.id * 2;
+    END""",
+    f"""CREATE TRIGGER {TABLE}_post_ad AFTER DELETE ON posts_post BEGIN
+        DELETE FROM {TABLE} WHERE rowid = old.id * 2;
+    END""",
+    f"""CREATE TRIGGER {TABLE}_comment_ai AFTER INSERT ON posts_comment
+    BEGIN
+        INSERT INTO {TABLE}(rowid, text, post_id)
+        VALUES (new.id * 2 + 1, new.text, new.post_id);
+    END""",
+    f"""CREATE TRIGGER {TABLE}_comment_au AFTER UPDATE OF text
+    ON posts_comment BEGIN
+        UPDATE {TABLE} SET text = new.text WHERE rowid = new.id * 2 + 1;
+    END""",
+    f"""CREATE TRIGGER {TABLE}_comment_ad AFTER DELETE ON posts_comment
+    BEGIN
+        DELETE FROM {TABLE} WHERE rowid = old.id * 2 + 1;
+    END""",
+]
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {TABLE}_{source}_{event}'
+    for source in ('post', 'comment') for event in ('ai', 'au', 'ad')
+] + [f'DROP TABLE IF EXISTS {TABLE}']
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_index(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+    schema_editor.execute(
+        f'INSERT INTO {TABLE}(rowid, text, post_id) '
+        'SELECT id * 2, text, id FROM posts_post'
+    )
+    schema_editor.execute(
+        f'INSERT INTO {TABLE}(rowid, text, post_id) '
+        'SELECT id * 2 + 1, text, post_id FROM posts_comment'
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db.models import Count, F, Min
+
+
+def dedupe_follows(apps, schema_editor):
+    """Перед ограничениями убираем дубли и подписки на себя."""
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    keep = Follow.objects.order_by().values('user', 'author').annotate(
+        keep=Min('pk')).values('keep')
+    stale = Follow.objects.exclude(pk__in=keep) | Follow.objects.filter(
+        user=F('author'))
+    users = set()
+    for user_id, author_id in stale.values_list('user', 'author'):
+        users.update((user_id, author_id))
+    if not users:
+        return
+    stale.delete()
+    for field, lookup in (('followers_count', 'author'),
+                          ('following_count', 'user')):
+        UserStats.objects.filter(user__in=users).update(**{field: 0})
+        rows = Follow.objects.filter(**{f'{lookup}__in': users}).order_by(
+        ).values(lookup).annotate(count=Count('pk'))
+        for row in rows:
+            UserStats.objects.filter(user=row[lookup]).update(
+                **{field: row['count']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_follows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='follow',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='follower', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created', '-id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['author', 'user'], name='follow_author_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.CheckConstraint(check=models.Q(_negated=True, user=django.db.models.expressions.F('author')), name='prevent_self_follow'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+search = import_module('posts.migrations.0013_search')
+
+
+def restore_triggers(apps, schema_editor):
+    """AddField в SQLite пересоздаёт posts_post, а с ней и триггеры поиска."""
+    if not search.fts5_available(schema_editor.connection):
+        return
+    for sql in search.CREATE_SQL:
+        if 'ON posts_post' in sql:
+            name = sql.split()[2]
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
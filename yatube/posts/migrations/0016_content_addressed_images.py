@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:09
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_mediafile'),
+        ('posts', '0015_post_image_size'),
+    ]
+
+    # Хранилище не влияет на схему: меняем только состояние, иначе
+    # SQLite пересоздаст posts_post вместе с триггерами поиска.
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='post',
+                name='image',
+                field=models.ImageField(blank=True, storage=core.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+            ),
+        ]),
+    ]
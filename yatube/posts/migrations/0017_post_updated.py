@@ -0,0 +1,26 @@
+from importlib import import_module
+
+import django.utils.timezone
+from django.db import migrations, models
+
+restore_triggers = import_module(
+    'posts.migrations.0015_post_image_size'
+).restore_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменён'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
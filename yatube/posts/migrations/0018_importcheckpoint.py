@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('source', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Архив')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Смещение')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Отметка загрузки',
+                'verbose_name_plural': 'Отметки загрузки',
+            },
+        ),
+    ]
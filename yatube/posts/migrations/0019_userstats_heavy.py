@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_heavy(apps, schema_editor):
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).update(heavy=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='heavy',
+            field=models.BooleanField(default=False, verbose_name='Популярный автор'),
+        ),
+        migrations.RunPython(mark_heavy, migrations.RunPython.noop),
+    ]
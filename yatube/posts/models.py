@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -9,6 +11,7 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Название группы')
     slug = models.SlugField(unique=True, verbose_name='Идентификатор')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
 
     class Meta:
         verbose_name = 'Группа'
@@ -18,6 +21,25 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    # Поля, которые читает posts/includes/post_card.html.
+    FEED_FIELDS = (
+        'text', 'pub_date', 'updated',
+        'image', 'image_width', 'image_height', 'author_id', 'group_id',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__slug', 'group__title',
+    )
+
+    def for_feed(self):
+        """Посты для ленты: автор и группа одним JOIN, без лишних колонок."""
+        return self.select_related('author', 'group').only(*self.FEED_FIELDS)
+
+    def for_detail(self):
+        return self.for_feed().select_related('author__stats').only(
+            *self.FEED_FIELDS, 'comments_count', 'author__stats__posts_count'
+        )
+
+
 class Post(models.Model):
     text = models.TextField('Текст')
     pub_date = models.DateTimeField(
@@ -25,6 +47,8 @@ class Post(models.Model):
         auto_now_add=True,
         db_index=True,
     )
+    # Версия карточки поста в кеше (posts/templatetags/post_cards.py).
+    updated = models.DateTimeField('Изменён', auto_now=True)
     group = models.ForeignKey(
         Group,
         on_delete=models.SET_NULL,
@@ -37,19 +61,39 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to=f'{settings.POST_UPLOAD}/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    # Размеры обработанной картинки (posts.images); у старых — пусто.
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
         verbose_name='Автор',
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев', default=0
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date',)
+        # Ленты автора и группы читаются по (FK, pub_date, id) без сортировки.
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -74,6 +118,10 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Пост: {self.post}, автор: {self.author}'
@@ -82,7 +130,8 @@ class Comment(models.Model):
 class Follow(models.Model):
     user = models.ForeignKey(User, models.CASCADE,
                              related_name="follower",
-                             verbose_name='Подписчик')
+                             verbose_name='Подписчик',
+                             db_index=False)
     author = models.ForeignKey(User, models.CASCADE,
                                related_name="following",
                                verbose_name='Автор')
@@ -90,6 +139,79 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        # Уникальность (user, author) заодно индексирует подписки читателя,
+        # обратный индекс — подписчиков автора.
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='prevent_self_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.user.username}-->{self.author.username}'
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, обновляются вместе с исходными строками."""
+    user = models.OneToOneField(User, models.CASCADE,
+                                primary_key=True,
+                                related_name='stats',
+                                verbose_name='Пользователь')
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    # Подписчиков больше TIMELINE_FANOUT_LIMIT: посты не раскладываются
+    # по лентам, а подмешиваются при чтении (posts.timeline).
+    heavy = models.BooleanField('Популярный автор', default=False)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self) -> str:
+        return str(self.user_id)
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: пост во «входящих» читателя."""
+    user = models.ForeignKey(User, models.CASCADE,
+                             related_name='timeline',
+                             verbose_name='Читатель')
+    post = models.ForeignKey(Post, models.CASCADE,
+                             related_name='timeline_entries',
+                             verbose_name='Пост')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user_id}: {self.post_id}'
+
+
+class ImportCheckpoint(models.Model):
+    """Докуда загружен архив JSONL (posts.importer)."""
+    source = models.CharField('Архив', max_length=255, primary_key=True)
+    offset = models.BigIntegerField('Смещение', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Отметка загрузки'
+        verbose_name_plural = 'Отметки загрузки'
+
+    def __str__(self) -> str:
+        return f'{self.source}: {self.offset}'
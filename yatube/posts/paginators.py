@@ -0,0 +1,200 @@
+import base64
+import binascii
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core import metrics
+from core.cache import get_or_compute, get_version, lookup
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+def encode_cursor(direction, value, pk, serialize=datetime.isoformat):
+    raw = f'{direction}|{serialize(value)}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse=parse_datetime):
+    """Разбирает курсор в (direction, value, pk); для битого — None."""
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode()
+        direction, value, pk = raw.split('|')
+        value = parse(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if direction not in (FORWARD, BACKWARD) or value is None:
+        return None
+    return direction, value, pk
+
+
+def seek(queryset, bound, backwards, key_field='pub_date', pk_field='pk'):
+    """Упорядочивает queryset по (key_field, pk_field) и отсекает bound."""
+    if backwards:
+        order, lookup = (key_field, pk_field), 'gt'
+    else:
+        order, lookup = (f'-{key_field}', f'-{pk_field}'), 'lt'
+    queryset = queryset.order_by(*order)
+    if bound is not None:
+        value, pk = bound
+        # OR сам по себе SQLite в диапазон индекса не превращает;
+        # нестрогое условие на key_field даёт SEARCH вместо SCAN.
+        queryset = queryset.filter(
+            Q(**{f'{key_field}__{lookup}e': value})
+            & (Q(**{f'{key_field}__{lookup}': value})
+               | Q(**{key_field: value, f'{pk_field}__{lookup}': pk}))
+        )
+    return queryset
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (key_field, pk) без COUNT(*) и OFFSET.
+
+    Страница ищется по индексу от последней записи предыдущей страницы,
+    поэтому глубокие страницы стоят столько же, сколько первая.
+    """
+    cursor_based = True
+    serialize_value = staticmethod(datetime.isoformat)
+    parse_value = staticmethod(parse_datetime)
+
+    def __init__(self, object_list, per_page, key_field='pub_date',
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.key_field = key_field
+        self._number = 1
+        self._has_next = False
+
+    @property
+    def num_pages(self):
+        # Общее число страниц не считаем: достаточно знать текущую
+        # и есть ли следующая, чтобы Page.has_next() работал как обычно.
+        return self._number + self._has_next
+
+    def get_key(self, obj):
+        return getattr(obj, self.key_field), obj.pk
+
+    def fetch(self, bound, backwards, limit):
+        """Первые limit объектов за границей bound в порядке обхода."""
+        queryset = seek(self.object_list, bound, backwards, self.key_field)
+        return list(queryset[:limit])
+
+    def get_cursor_page(self, cursor=None):
+        decoded = decode_cursor(cursor, self.parse_value) if cursor else None
+        if decoded is None:
+            direction, bound = FORWARD, None
+        else:
+            direction, bound = decoded[0], decoded[1:]
+        backwards = direction == BACKWARD
+        items = self.fetch(bound, backwards, self.per_page + 1)
+        if not items and bound is not None:
+            return self.get_cursor_page()
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if backwards:
+            items.reverse()
+            return self._make_page(items, True, has_more)
+        return self._make_page(items, has_more, bound is not None)
+
+    def _make_page(self, items, has_next, has_previous):
+        self._has_next = has_next
+        # Абсолютный номер страницы неизвестен: 2 лишь означает,
+        # что перед ней есть другие, и включает Page.has_previous().
+        self._number = 2 if has_previous else 1
+        page = self._get_page(items, self._number, self)
+        page.next_cursor = page.previous_cursor = None
+        if has_next:
+            page.next_cursor = encode_cursor(
+                FORWARD, *self.get_key(items[-1]), self.serialize_value
+            )
+        if has_previous:
+            page.previous_cursor = encode_cursor(
+                BACKWARD, *self.get_key(items[0]), self.serialize_value
+            )
+        return page
+
+
+class CachedCountPaginator(Paginator):
+    """Нумерованная пагинация с кешированным COUNT(*) и окном страниц.
+
+    Точное число записей кешируется по сигнатуре запроса и версиям
+    namespaces через get_or_compute: COUNT(*) после записи считает
+    один запрос. Большие числа (от PAGINATOR_ESTIMATE_LIMIT) ещё и
+    переживают смену версии: такой ленте достаточно оценки, а
+    пересчитывать её после каждого поста дорого.
+    """
+    count_is_estimate = False
+
+    def __init__(self, object_list, per_page, namespaces=('posts',),
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.namespaces = namespaces
+
+    def _count_keys(self):
+        signature = hashlib.md5(
+            str(self.object_list.query).encode()
+        ).hexdigest()
+        version = ':'.join(
+            str(get_version(namespace)) for namespace in self.namespaces
+        )
+        return (f'paginator_count:{signature}',
+                f'paginator_estimate:{signature}', version)
+
+    def _compute_count(self, estimate_key):
+        count = self.object_list.count()
+        if count >= settings.PAGINATOR_ESTIMATE_LIMIT:
+            cache.set(estimate_key, count, settings.PAGINATOR_ESTIMATE_TTL)
+        return count
+
+    @cached_property
+    def count(self):
+        try:
+            key, estimate_key, version = self._count_keys()
+        except EmptyResultSet:
+            # filter(pk__in=[]) и none() заведомо пусты: SQL у них нет.
+            return 0
+        count = lookup(key, version)
+        if count is not None:
+            metrics.cache_lookup(True)
+            return count
+        estimate = cache.get(estimate_key)
+        if estimate is not None:
+            self.count_is_estimate = True
+            return estimate
+        return get_or_compute(
+            key, lambda: self._compute_count(estimate_key),
+            settings.PAGINATOR_COUNT_TTL, version,
+        )
+
+    def get_page_window(self, number):
+        """Номера вокруг текущей страницы плюс первая и последняя.
+
+        None обозначает пропуск между ними.
+        """
+        radius = settings.PAGINATOR_WINDOW
+        first = max(1, number - radius)
+        last = min(self.num_pages, number + radius)
+        window = list(range(first, last + 1))
+        if first > 1:
+            window[:0] = [1] if first == 2 else [1, None]
+        if last < self.num_pages:
+            window += (
+                [self.num_pages] if last == self.num_pages - 1
+                else [None, self.num_pages]
+            )
+        return window
+
+    def _get_page(self, *args, **kwargs):
+        page = super()._get_page(*args, **kwargs)
+        page.page_window = self.get_page_window(page.number)
+        return page
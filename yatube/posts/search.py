@@ -0,0 +1,163 @@
+import functools
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from core.db import immediate
+
+from .models import Comment, Post
+from .paginators import CursorPaginator
+
+TABLE = 'posts_search'
+WORD_RE = re.compile(r'\w+')
+
+# Посты лежат в индексе под rowid = id * 2, комментарии — id * 2 + 1
+# (см. миграцию 0013_search). Источник: (модель, rowid, post_id).
+SOURCES = [
+    (Post, 'id * 2', 'id'),
+    (Comment, 'id * 2 + 1', 'post_id'),
+]
+
+
+@functools.lru_cache(maxsize=None)
+def fts_enabled():
+    return (
+        connection.vendor == 'sqlite'
+        and TABLE in connection.introspection.table_names()
+    )
+
+
+def match_expression(query):
+    """Слова запроса в кавычках: пользовательский ввод не ломает MATCH."""
+    return ' '.join(f'"{word}"' for word in WORD_RE.findall(query))
+
+
+def search_post_ids(query, group=None, author=None, bound=None,
+                    backwards=False, limit=None, posts_only=False):
+    """Список (score, post_id) по возрастанию score; меньше — лучше."""
+    expression = match_expression(query)
+    if not expression:
+        return []
+    match, params = [f'{TABLE} MATCH %s'], [expression]
+    if posts_only:
+        match.append('rowid %% 2 = 0')
+    where = []
+    if group is not None:
+        where.append('p.group_id = %s')
+        params.append(group.pk)
+    if author is not None:
+        where.append('p.author_id = %s')
+        params.append(author.pk)
+    having, order = '', 'ASC'
+    if bound is not None:
+        having = 'HAVING (score, post_id) {} (%s, %s)'.format(
+            '<' if backwards else '>'
+        )
+        params.extend(bound)
+    if backwards:
+        order = 'DESC'
+    # bm25() нельзя звать внутри агрегата, поэтому ранжируем
+    # во вложенном запросе, а лучший ранг поста берём снаружи.
+    # LIMIT -1 не даёт SQLite «расплющить» подзапрос во внешний.
+    sql = f"""
+        SELECT MIN(hits.rank) AS score, hits.post_id AS post_id
+        FROM (
+            SELECT bm25({TABLE}) AS rank, post_id FROM {TABLE}
+            WHERE {' AND '.join(match)} LIMIT -1
+        ) hits
+        JOIN posts_post p ON p.id = hits.post_id
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        GROUP BY hits.post_id {having}
+        ORDER BY score {order}, post_id {order}
+    """
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def fallback_queryset(query, group=None, author=None):
+    """Поиск без FTS5: LIKE по постам и комментариям."""
+    words = WORD_RE.findall(query)
+    if not words:
+        return Post.objects.none()
+    queryset = Post.objects.for_feed()
+    for word in words:
+        queryset = queryset.filter(
+            Q(text__icontains=word) | Q(comments__text__icontains=word)
+        )
+    if group is not None:
+        queryset = queryset.filter(group=group)
+    if author is not None:
+        queryset = queryset.filter(author=author)
+    return queryset.distinct()
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная выдача поиска, упорядоченная по релевантности."""
+    serialize_value = staticmethod(repr)
+    parse_value = staticmethod(float)
+
+    def __init__(self, query, per_page, group=None, author=None, **kwargs):
+        super().__init__(Post.objects.for_feed(), per_page, **kwargs)
+        self.query = query
+        self.group = group
+        self.author = author
+        self.scores = {}
+
+    def get_key(self, obj):
+        return self.scores[obj.pk], obj.pk
+
+    def fetch(self, bound, backwards, limit):
+        rows = search_post_ids(
+            self.query, self.group, self.author, bound, backwards, limit
+        )
+        self.scores.update((pk, score) for score, pk in rows)
+        posts = self.object_list.in_bulk([pk for _, pk in rows])
+        return [posts[pk] for _, pk in rows if pk in posts]
+
+
+def rebuild(batch_size, clear=False, stdout=None):
+    """Переиндексирует посты и комментарии пачками.
+
+    Каждая пачка — своя короткая транзакция, поэтому писатели ждут
+    не дольше одной пачки.
+    """
+    if clear:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+    total = 0
+    for model, rowid, post_id in SOURCES:
+        table = model._meta.db_table
+        last_id = 0
+        while True:
+            with immediate(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT MAX(id) FROM (SELECT id FROM {table} '
+                    'WHERE id > %s ORDER BY id LIMIT %s)',
+                    [last_id, batch_size],
+                )
+                batch_last = cursor.fetchone()[0]
+                if batch_last is None:
+                    break
+                cursor.execute(
+                    f'INSERT OR REPLACE INTO {TABLE}(rowid, text, post_id) '
+                    f'SELECT {rowid}, text, {post_id} FROM {table} '
+                    'WHERE id > %s AND id <= %s',
+                    [last_id, batch_last],
+                )
+                total += cursor.rowcount
+            last_id = batch_last
+            if stdout is not None:
+                stdout.write(f'{table}: до id {last_id}')
+    optimize()
+    return total
+
+
+def optimize():
+    """Сливает сегменты индекса после массовой записи."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
@@ -0,0 +1,100 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import storage
+from core.cache import bump_version
+
+from . import images, timeline
+from .counters import change_user_stats, increment
+from .follow_graph import graph
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+def change_group_posts(group_id, delta):
+    if group_id is not None:
+        increment(Group.objects.filter(pk=group_id), posts_count=delta)
+
+
+def release_image(name):
+    if name:
+        storage.release(
+            Post.image.field.storage, name, images.delete_variants
+        )
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    instance._old_group_id = instance._old_image = None
+    if instance.pk:
+        instance._old_group_id, instance._old_image = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', 'image').first() or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+        change_user_stats(instance.author_id, posts_count=1)
+        change_group_posts(instance.group_id, 1)
+    elif instance._old_group_id != instance.group_id:
+        change_group_posts(instance._old_group_id, -1)
+        change_group_posts(instance.group_id, 1)
+    if (instance._old_image or '') != (instance.image.name or ''):
+        if instance.image:
+            storage.retain(instance.image.name)
+        release_image(instance._old_image)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_user_stats(instance.author_id, posts_count=-1)
+    change_group_posts(instance.group_id, -1)
+    release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def feed_changed(sender, **kwargs):
+    bump_version('posts')
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        increment(Post.objects.filter(pk=instance.post_id),
+                  comments_count=1)
+        bump_version(f'comments:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    increment(Post.objects.filter(pk=instance.post_id), comments_count=-1)
+    bump_version(f'comments:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+        graph.changed(instance.user_id, instance.author_id, followed=True)
+        change_user_stats(instance.user_id, following_count=1)
+        change_user_stats(instance.author_id, followers_count=1)
+        timeline.update_heavy(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+    graph.changed(instance.user_id, instance.author_id, followed=False)
+    change_user_stats(instance.user_id, following_count=-1)
+    change_user_stats(instance.author_id, followers_count=-1)
+    timeline.update_heavy(instance.author_id)
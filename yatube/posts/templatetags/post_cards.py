@@ -0,0 +1,77 @@
+"""Кеш карточек постов: лента собирает готовый HTML одним get_many.
+
+Ключ карточки — отпечаток загруженных полей: время правки поста,
+имя автора, название и slug группы. Правка поста, смена имени
+автора или переименование группы дают новый ключ без отдельной
+инвалидации, а старые карточки дожидаются POST_CARD_TTL.
+"""
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from core import metrics
+from core.cache import get_version
+
+register = template.Library()
+
+CARD = 'posts/includes/post_card.html'
+KEY = 'post_card:{}:{}'
+
+
+def card_key(post, hide_group, version):
+    author, group = post.author, post.group
+    parts = (
+        version, post.updated.timestamp(), hide_group,
+        author.username, author.first_name, author.last_name,
+        group.slug if group else '', group.title if group else '',
+    )
+    return KEY.format(post.pk, hashlib.md5(
+        '\0'.join(map(str, parts)).encode()
+    ).hexdigest())
+
+
+def cacheable(post):
+    # Картинки до обработки при загрузке показывают заглушку, пока
+    # строится миниатюра, — такую карточку не запоминаем.
+    return not post.image or post.image_width
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, hide_group=False):
+    """HTML карточек posts по порядку; недостающие рендерит и кеширует.
+
+    Версия post_cards сбрасывает все карточки, например после
+    правки шаблона.
+    """
+    posts = list(posts)
+    version = get_version('post_cards')
+    keys = {
+        post.pk: card_key(post, hide_group, version)
+        for post in posts if cacheable(post)
+    }
+    cached = cache.get_many(keys.values()) if keys else {}
+    card = context.template.engine.get_template(CARD)
+    cards, missing = [], {}
+    for post in posts:
+        key = keys.get(post.pk)
+        html = cached.get(key)
+        if key:
+            metrics.cache_lookup(html is not None)
+        if html is None:
+            html = card.render(
+                context.new({'post': post, 'hide_group': hide_group})
+            )
+            if key:
+                missing[key] = html
+        cards.append(mark_safe(html))
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_TTL)
+    return cards
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post, hide_group=False):
+    return post_cards(context, [post], hide_group)[0]
@@ -0,0 +1,22 @@
+from django import template
+
+from posts import images, thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, alias):
+    """Готовая миниатюра или None; отсутствующую ставит в очередь."""
+    if not image:
+        return None
+    ready = thumbnails.get_ready(image.name, alias)
+    if ready is None:
+        thumbnails.schedule(image.name)
+    return ready
+
+
+@register.simple_tag
+def post_srcset(post):
+    """srcset обработанной при загрузке картинки (posts.images)."""
+    return images.srcset(post)
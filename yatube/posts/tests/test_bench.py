@@ -0,0 +1,78 @@
+import random
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import bench
+from ..models import Follow, Post, TimelineEntry, User
+from ..urls import urlpatterns
+
+
+class BenchTest(TestCase):
+    def test_seed_and_run(self):
+        """Засев строит ленты и счётчики, замер обходит маршруты чтения."""
+        dataset = bench.seed(
+            posts=50, users=10, groups=2, follows=3, comments=1, skew=1.1,
+            rng=random.Random(0),
+        )
+        self.assertEqual(dataset['posts'], 50)
+        self.assertEqual(dataset['comments'], 50)
+        self.assertTrue(TimelineEntry.objects.exists())
+        top = User.objects.order_by('-stats__posts_count').first()
+        self.assertEqual(top.stats.posts_count, top.posts.count())
+        follows = Follow.objects.count()
+        results = bench.run(repeat=2, warmup=1)
+        self.assertEqual(
+            len(results), (len(urlpatterns) - len(bench.WRITES)) * 2
+        )
+        for route in ('index', 'post_detail', 'profile', 'search'):
+            with self.subTest(route=route):
+                result = results[f'{route}:anonymous']
+                self.assertEqual(result['status'], 200)
+                self.assertEqual(result['errors'], 0)
+                self.assertLessEqual(result['p50'], result['p99'])
+                self.assertGreater(result['queries'], 0)
+        # Сессия, пользователь и сама выгрузка: тело читается в замере.
+        self.assertEqual(results['export_posts:authorized']['queries'], 3)
+        self.assertEqual(results['post_create:anonymous']['errors'], 2)
+        self.assertEqual(results['post_edit:authorized']['status'], 200)
+        self.assertGreater(results['index:anonymous']['sql_ms'], 0)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Follow.objects.count(), follows)
+
+    def test_bulk_create_in_batches(self):
+        """Генератор уходит в базу пачками, а не списком целиком."""
+        user = User.objects.create_user(username='author')
+        posts = (Post(author=user, text=str(i)) for i in range(5))
+        with mock.patch.object(bench, 'BATCH_SIZE', 2):
+            with CaptureQueriesContext(connection) as queries:
+                bench.bulk_create(Post, posts)
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(Post.objects.count(), 5)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(bench.percentile(values, 50), 50)
+        self.assertEqual(bench.percentile(values, 99), 99)
+        self.assertEqual(bench.percentile([7], 95), 7)
+
+    def test_compare(self):
+        baseline = {'index:anonymous': {'p95': 10, 'queries': 3}}
+        cases = [
+            [{'p95': 11, 'queries': 3, 'errors': 0}, []],
+            [{'p95': 13, 'queries': 3, 'errors': 0},
+             [('index:anonymous', 'p95', 10, 13)]],
+            [{'p95': 10, 'queries': 4, 'errors': 0},
+             [('index:anonymous', 'queries', 3, 4)]],
+            [{'p95': 10, 'queries': 3, 'errors': 1},
+             [('index:anonymous', 'errors', 0, 1)]],
+        ]
+        for current, expected in cases:
+            with self.subTest(current=current):
+                self.assertEqual(
+                    bench.compare({'index:anonymous': current}, baseline,
+                                  0.2),
+                    expected,
+                )
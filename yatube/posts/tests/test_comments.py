@@ -0,0 +1,54 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+PER_PAGE = 3
+COMMENTS_COUNT = PER_PAGE * 2 + 1
+
+
+@override_settings(COMMENTS_PER_PAGE=PER_PAGE)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='User')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(COMMENTS_COUNT)
+        )
+        cls.expected = list(
+            cls.post.comments.order_by('-created', '-pk')
+            .values_list('pk', flat=True)
+        )
+        cls.detail_url = reverse('posts:post_detail', args=[cls.post.pk])
+        cls.fragment_url = reverse('posts:post_comments', args=[cls.post.pk])
+        cls.guest_client = Client()
+
+    def test_first_page_with_detail(self):
+        """Страница поста рисует только свежую пачку комментариев."""
+        # Пост и одна пачка комментариев с авторами.
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(self.detail_url)
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.pk for comment in comments], self.expected[:PER_PAGE]
+        )
+        self.assertContains(response, 'data-fragment')
+
+    def test_fragment_walks_all_comments(self):
+        """Фрагменты по курсору отдают остальные комментарии без повторов."""
+        comments = self.guest_client.get(self.detail_url).context['comments']
+        seen = [comment.pk for comment in comments]
+        while comments.has_next():
+            response = self.guest_client.get(
+                self.fragment_url, {'cursor': comments.next_cursor}
+            )
+            self.assertTemplateUsed(
+                response, 'posts/includes/comment_list.html'
+            )
+            self.assertNotContains(response, '<html')
+            comments = response.context['comments']
+            seen.extend(comment.pk for comment in comments)
+        self.assertEqual(seen, self.expected)
@@ -0,0 +1,113 @@
+import multiprocessing
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from core.cache import bump_version
+
+from ..models import Comment, Follow, Group, Post, User
+
+USERNAME = 'User'
+AUTHOR = 'Author'
+SLUG = 'slug'
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.group = Group.objects.create(
+            title='Группа', slug=SLUG, description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст'
+        )
+        cls.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[SLUG]),
+            reverse('posts:profile', args=[AUTHOR]),
+            reverse('posts:post_detail', args=[cls.post.pk]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, client, url, header='HTTP_IF_NONE_MATCH',
+                   validator='ETag'):
+        # Первый ответ может выдать CSRF-куку, и ETag сменится.
+        client.get(url)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return client.get(url, **{header: response[validator]})
+
+    def test_not_modified(self):
+        """Повторный запрос с валидатором получает 304 без рендера."""
+        for client in (self.guest_client, self.authorized_client):
+            for url in self.urls:
+                with self.subTest(url=url):
+                    response = self.revalidate(client, url)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertIsNone(response.context)
+
+    def test_write_in_other_process(self):
+        """Версию, сброшенную другим воркером, видит и этот."""
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        worker = multiprocessing.get_context('fork').Process(
+            target=bump_version, args=('posts',)
+        )
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_no_last_modified(self):
+        """Без Last-Modified правка не прячется за If-Modified-Since."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный текст')
+
+    def test_changes_invalidate_etag(self):
+        """Новые посты, правки и комментарии меняют ETag."""
+        changes = [
+            lambda: Post.objects.create(author=self.author, text='Новый'),
+            lambda: Post.objects.filter(pk=self.post.pk).first().save(),
+            lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='Комментарий'
+            ),
+        ]
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        for change in changes:
+            etag = self.guest_client.get(url)['ETag']
+            change()
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+    def test_viewer_state_changes_etag(self):
+        """ETag зависит от пользователя и его подписок."""
+        url = reverse('posts:profile', args=[AUTHOR])
+        guest_etag = self.guest_client.get(url)['ETag']
+        etag = self.authorized_client.get(url)['ETag']
+        self.assertNotEqual(guest_etag, etag)
+        Follow.objects.create(user=self.user, author=self.author)
+        for client, old_etag in (
+            (self.authorized_client, etag), (self.guest_client, guest_etag)
+        ):
+            with self.subTest(client=client):
+                response = client.get(url, HTTP_IF_NONE_MATCH=old_etag)
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,74 @@
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User, UserStats
+
+USERNAME = 'reader'
+AUTHOR = 'author'
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        cls.group2 = Group.objects.create(
+            title='Группа 2', slug='group-2', description='-'
+        )
+        cls.client_user = Client()
+        cls.client_user.force_login(cls.user)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_views_update_counters(self):
+        """Счётчики меняются вместе с подпиской, постом и комментарием."""
+        self.client_user.get(
+            reverse('posts:profile_follow', args=[AUTHOR])
+        )
+        self.client_user.post(
+            reverse('posts:post_create'),
+            {'text': 'Текст', 'group': self.group.pk},
+        )
+        post = Post.objects.get(author=self.user)
+        self.client_user.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': '-'}
+        )
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.assertEqual(Post.objects.get().comments_count, 1)
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 1)
+        self.client_user.get(
+            reverse('posts:profile_unfollow', args=[AUTHOR])
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+
+    def test_group_change_moves_count(self):
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='-'
+        )
+        post.group = self.group2
+        post.save()
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 0)
+        self.assertEqual(
+            Group.objects.get(pk=self.group2.pk).posts_count, 1
+        )
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_reconcile_command(self):
+        post = Post.objects.create(author=self.author, text='-')
+        Comment.objects.create(post=post, author=self.user, text='-')
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        UserStats.objects.filter(user=self.user).delete()
+        Post.objects.update(comments_count=0)
+        call_command('reconcile_counters', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+        self.assertEqual(Post.objects.get().comments_count, 1)
@@ -0,0 +1,89 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='-')
+        Post.objects.bulk_create([
+            Post(author=cls.author, group=cls.group, text=f'Пост {i}')
+            for i in range(5)
+        ] + [Post(author=cls.other, text='Чужой, "с кавычками"')])
+        Post.objects.filter(text='Пост 0').update(
+            pub_date=timezone.make_aware(datetime(2020, 1, 1))
+        )
+        post = Post.objects.get(text='Пост 1')
+        Comment.objects.create(post=post, author=cls.other, text='Ого')
+        Follow.objects.create(user=cls.author, author=cls.other)
+        Follow.objects.create(user=cls.other, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(f'posts:{name}'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv_own_posts(self):
+        """Не персонал выгружает только свои посты; строки без N+1."""
+        with self.assertNumQueries(3):
+            rows = list(csv.DictReader(
+                io.StringIO(self.get('export_posts', author='other').decode())
+            ))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row['author'] for row in rows}, {'author'})
+        self.assertEqual(rows[0]['group'], 'group')
+
+    def test_jsonl_gzip_filters(self):
+        self.client.force_login(self.staff)
+        content = gzip.decompress(self.get(
+            'export_posts', format='jsonl', gzip='on', group='group',
+            since='2021-01-01',
+        ))
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(records), 4)
+        self.assertNotIn('Пост 0', [record['text'] for record in records])
+        content = self.get('export_comments', format='jsonl', author='other')
+        self.assertEqual(json.loads(content)['text'], 'Ого')
+
+    def test_follows(self):
+        rows = self.get('export_follows').decode().splitlines()
+        self.assertEqual(rows, ['user,author', 'author,other'])
+        response = self.client.get(reverse('posts:export_follows'),
+                                   {'since': '2021-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_login_required(self):
+        response = Client().get(reverse('posts:export_posts'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_command(self):
+        handle, path = tempfile.mkstemp(dir=settings.BASE_DIR)
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command('export_data', 'posts', path, '--gzip',
+                     '--chunk-size', '2', stdout=io.StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), Post.objects.count())
+        self.assertIn('Чужой, "с кавычками"', [row['text'] for row in rows])
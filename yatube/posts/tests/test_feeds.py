@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+AUTHOR = 'Author'
+SLUG = 'slug'
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.group = Group.objects.create(
+            title='Группа', slug=SLUG, description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст поста'
+        )
+        cls.urls = [
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', args=[SLUG]),
+            reverse('posts:group_atom', args=[SLUG]),
+            reverse('posts:profile_rss', args=[AUTHOR]),
+            reverse('posts:profile_atom', args=[AUTHOR]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        """Лента строится одним запросом, повтор — из кеша."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                with self.assertNumQueries(1):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Текст поста', response.content.decode())
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+
+    def test_empty_and_missing_owner(self):
+        Group.objects.create(title='Пустая', slug='empty', description='-')
+        response = self.client.get(reverse('posts:group_rss', args=['empty']))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Пустая', response.content.decode())
+        for url in (reverse('posts:group_atom', args=['missing']),
+                    reverse('posts:profile_rss', args=['missing'])):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_conditional_get(self):
+        """Повтор с ETag — 304, новый пост меняет ленту."""
+        url = reverse('posts:index_rss')
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Новый пост', response.content.decode())
@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from core.cache import bump_version
+
+from ..follow_graph import ENTRY_OVERHEAD, graph
+from ..models import Follow, User
+
+
+class FollowGraphTest(TransactionTestCase):
+    """Граф кеширует только закоммиченное, поэтому без TestCase."""
+
+    def setUp(self):
+        cache.clear()
+        graph.clear()
+        self.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(4)
+        ]
+        self.reader, *self.authors = [user.pk for user in self.users]
+        for author in self.authors[:2]:
+            Follow.objects.create(user_id=self.reader, author_id=author)
+
+    def tearDown(self):
+        # Таблицы очищаются, а граф и версии живут дольше теста.
+        graph.clear()
+        cache.clear()
+
+    def test_sorted_arrays_and_lookups(self):
+        self.assertEqual(list(graph.following(self.reader)),
+                         sorted(self.authors[:2]))
+        self.assertEqual(list(graph.followers(self.authors[0])),
+                         [self.reader])
+        self.assertTrue(graph.is_following(self.reader, self.authors[1]))
+        self.assertFalse(graph.is_following(self.reader, self.authors[2]))
+        with self.assertNumQueries(0):
+            graph.is_following(self.reader, self.authors[0])
+
+    def test_incremental_update_without_reload(self):
+        """Своя подписка правит массив на месте после коммита."""
+        graph.following(self.reader)
+        graph.followers(self.authors[2])
+        Follow.objects.create(user_id=self.reader, author_id=self.authors[2])
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                graph.is_following(self.reader, self.authors[2])
+            )
+            self.assertEqual(list(graph.followers(self.authors[2])),
+                             [self.reader])
+        Follow.objects.filter(author_id=self.authors[0]).delete()
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                graph.is_following(self.reader, self.authors[0])
+            )
+
+    def test_foreign_change_reloads(self):
+        """Изменение из другого процесса приходит через версию кеша."""
+        graph.following(self.reader)
+        Follow.objects.bulk_create(
+            [Follow(user_id=self.reader, author_id=self.authors[2])]
+        )
+        bump_version(f'follow:{self.reader}')
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                graph.is_following(self.reader, self.authors[2])
+            )
+
+    @override_settings(FOLLOW_GRAPH_BUDGET=(ENTRY_OVERHEAD + 16) * 2)
+    def test_lru_eviction(self):
+        graph.following(self.reader)
+        graph.followers(self.authors[0])
+        graph.following(self.reader)
+        graph.followers(self.authors[1])
+        self.assertLessEqual(graph.size, (ENTRY_OVERHEAD + 16) * 2)
+        with self.assertNumQueries(0):
+            graph.following(self.reader)
+        with self.assertNumQueries(1):
+            graph.followers(self.authors[0])
+
+    def test_rebuild(self):
+        graph.rebuild()
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                graph.is_following(self.reader, self.authors[0])
+            )
+            self.assertEqual(list(graph.followers(self.authors[1])),
+                             [self.reader])
@@ -7,6 +7,8 @@ from django.conf import settings
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core.storage import is_addressed
+
 from ..models import Group, Post, User, Comment
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -113,8 +115,12 @@ class FormTest(TestCase):
         self.assertEqual(post.text, form_data["text"])
         self.assertEqual(post.group.id, form_data["group"])
         self.assertEqual(post.author, self.user)
-        self.assertEqual(post.image.name,
-                         f'{settings.POST_UPLOAD}/{uploaded.name}')
+        # Картинка перекодирована и названа по хешу содержимого.
+        self.assertTrue(
+            post.image.name.startswith(f'{settings.POST_UPLOAD}/')
+        )
+        self.assertTrue(is_addressed(post.image.name))
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
 
     def test_edit_post(self):
         """Тестируем изменение поста."""
@@ -144,8 +150,12 @@ class FormTest(TestCase):
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.author, self.post.author)
         self.assertEqual(post.group.id, form_data['group'])
-        self.assertEqual(post.image.name,
-                         f'{settings.POST_UPLOAD}/{uploaded.name}')
+        # Картинка перекодирована и названа по хешу содержимого.
+        self.assertTrue(
+            post.image.name.startswith(f'{settings.POST_UPLOAD}/')
+        )
+        self.assertTrue(is_addressed(post.image.name))
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
 
     def test_leave_comment_auth_user(self):
         """Тест авторизированный пользователь может оставить коммент."""
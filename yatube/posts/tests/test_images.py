@@ -0,0 +1,177 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import MediaFile
+from core.storage import is_addressed
+
+from .. import images
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+USERNAME = 'author'
+ORIENTATION = 0x0112
+MAKE = 0x010F
+
+
+def photo(size=(1600, 800)):
+    """JPEG как с телефона: EXIF с поворотом на 90° и маркой камеры."""
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    exif[MAKE] = 'Camera'
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile(
+        'photo.jpeg', buffer.getvalue(), content_type='image/jpeg'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIZE=1000,
+                   POST_IMAGE_WIDTHS=(320, 640))
+class ImagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_process(self):
+        """Поворот по EXIF, ограничение размера, без метаданных."""
+        processed = images.process(photo())
+        self.assertEqual((processed.width, processed.height), (500, 1000))
+        with Image.open(processed) as image:
+            self.assertEqual(image.size, (500, 1000))
+            self.assertEqual(dict(image.getexif()), {})
+
+    def test_upload_stores_variants(self):
+        self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Текст', 'image': photo()}
+        )
+        post = Post.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (500, 1000))
+        variants = images.variants(post.image.name, 500, 1000)
+        self.assertEqual([size[1:] for size in variants], [(320, 640)])
+        with default_storage.open(variants[0][0]) as file:
+            self.assertEqual(Image.open(file).size, (320, 640))
+        content = self.client.get(
+            reverse('posts:profile', args=[USERNAME])
+        ).content.decode()
+        self.assertIn(
+            f'srcset="{default_storage.url(variants[0][0])} 320w, '
+            f'{post.image.url} 500w"', content
+        )
+        self.assertIn('width="500" height="1000"', content)
+        image = self.client.get(
+            reverse('api:post_detail', args=[post.pk])
+        ).json()['image']
+        self.assertEqual(image['variants'], [{
+            'url': default_storage.url(variants[0][0]),
+            'width': 320, 'height': 640,
+        }])
+
+
+def run_on_commit(func):
+    func()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIZE=1000,
+                   POST_IMAGE_WIDTHS=(320, 640), MEDIA_GC_GRACE=0)
+class DeduplicationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @mock.patch('core.storage.transaction.on_commit', run_on_commit)
+    def test_same_image_stored_once(self):
+        for _ in range(2):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                {'text': 'Мем', 'image': photo()},
+            )
+        first, second = Post.objects.all()
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(MediaFile.objects.get(name=name).refs, 2)
+        variant = images.variant_name(name, 320)
+        first.delete()
+        self.assertTrue(default_storage.exists(name))
+        second.delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(variant))
+
+    def test_convert_media(self):
+        legacy = [
+            default_storage.save(f'posts/{name}.jpg', photo())
+            for name in ('first', 'second')
+        ]
+        posts = [
+            Post.objects.create(author=self.user, text='-', image=name)
+            for name in legacy
+        ]
+        call_command('convert_media', stdout=io.StringIO())
+        names = {
+            post.image.name for post in Post.objects.filter(
+                pk__in=[post.pk for post in posts]
+            )
+        }
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(is_addressed(name))
+        self.assertTrue(default_storage.exists(name))
+        for old in legacy:
+            self.assertFalse(default_storage.exists(old))
+        self.assertEqual(MediaFile.objects.get(name=name).refs, 2)
+
+    def test_convert_media_removes_orphans(self):
+        """Файл из откатившейся загрузки удаляется вместе с вариантами."""
+        kept = Post.objects.create(
+            author=self.user, text='-', image=default_storage.save(
+                'posts/kept.jpg', photo()
+            ),
+        )
+        orphan = Post.image.field.storage.save(
+            'posts/orphan.jpg', photo((900, 900))
+        )
+        images.save_variants(orphan)
+        call_command('convert_media', stdout=io.StringIO())
+        kept.refresh_from_db()
+        self.assertTrue(default_storage.exists(kept.image.name))
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertFalse(
+            default_storage.exists(images.variant_name(orphan, 320))
+        )
+
+    def test_collect_media(self):
+        """Уборка по cron удаляет файл, отпущенный сразу после загрузки."""
+        orphan = Post.image.field.storage.save('posts/a.jpg', photo())
+        call_command('collect_media', '--grace', '60', stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(orphan))
+        call_command('collect_media', stdout=io.StringIO())
+        self.assertFalse(default_storage.exists(orphan))
@@ -0,0 +1,126 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.models import MediaFile
+
+from ..models import (Comment, Follow, Group, ImportCheckpoint, Post,
+                      TimelineEntry, User)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def dump(path, records, compress=False):
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', encoding='utf-8') as file:
+        for record in records:
+            line = record if isinstance(record, str) else json.dumps(record)
+            file.write(line + '\n')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_WIDTHS=(16,))
+class ImportJsonlTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.archive_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        self.reader = User.objects.create_user(username='reader')
+        self.existing = User.objects.create_user(username='leo')
+        Follow.objects.create(user=self.reader, author=self.existing)
+
+    def path(self, name):
+        return os.path.join(self.archive_dir, name)
+
+    def test_import(self):
+        """Пользователи, группы, посты с картинкой и комментариями."""
+        Image.new('RGB', (40, 20), 'red').save(self.path('cat.png'))
+        archive = self.path('dump.jsonl.gz')
+        dump(archive, [
+            {'type': 'user', 'username': 'tom', 'first_name': 'Том'},
+            {'type': 'group', 'slug': 'cats', 'title': 'Кошки'},
+            {'author': 'leo', 'group': 'cats', 'text': 'Кот',
+             'pub_date': '2020-01-02T10:00:00+00:00', 'image': 'cat.png',
+             'comments': [
+                 {'author': 'tom', 'text': 'Мяу'},
+                 {'author': 'new', 'text': 'Ого',
+                  'created': '2020-01-03T10:00:00+00:00'},
+             ]},
+            {'author': 'tom', 'text': 'Без группы', 'image': 'missing.png'},
+        ], compress=True)
+        call_command('import_jsonl', archive, '--batch-size', '2',
+                     stdout=io.StringIO())
+        post = Post.objects.select_related('author__stats').get(text='Кот')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.updated, post.pub_date)
+        self.assertEqual(post.group, Group.objects.get(slug='cats'))
+        self.assertEqual(post.comments_count, 2)
+        self.assertEqual(post.author.stats.posts_count, 1)
+        self.assertEqual((post.image_width, post.image_height), (40, 20))
+        self.assertEqual(MediaFile.objects.get(name=post.image.name).refs, 1)
+        self.assertEqual(
+            Comment.objects.get(text='Мяу').created, post.pub_date
+        )
+        self.assertEqual(User.objects.get(username='tom').first_name, 'Том')
+        self.assertFalse(
+            User.objects.get(username='new').has_usable_password()
+        )
+        self.assertFalse(Post.objects.get(text='Без группы').image)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        # Даты из архива не отключили auto_now_add у обычных записей.
+        self.assertGreater(
+            Post.objects.create(author=self.existing, text='Сейчас')
+            .pub_date.year, 2020,
+        )
+
+    def test_resume(self):
+        """Сбой в пачке не теряет прежние и не дублирует их при повторе."""
+        archive = self.path('dump.jsonl')
+        posts = [{'author': 'leo', 'text': f'Пост {i}'} for i in range(3)]
+        dump(archive, posts[:2] + ['{broken'])
+        with self.assertRaises(CommandError):
+            call_command('import_jsonl', archive, '--batch-size', '1',
+                         stdout=io.StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        dump(archive, posts)
+        call_command('import_jsonl', archive, '--batch-size', '1',
+                     stdout=io.StringIO())
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Пост 0', 'Пост 1', 'Пост 2'],
+        )
+        self.assertEqual(
+            ImportCheckpoint.objects.get().offset, os.path.getsize(archive)
+        )
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader)
+                         .count(), 3)
+
+    def test_database_error_reports_offset(self):
+        """Ошибка базы в пачке — CommandError со смещением этой пачки."""
+        archive = self.path('dump.jsonl')
+        dump(archive, [{'author': 'leo', 'text': 'Пост'},
+                       {'author': 'leo', 'text': None}])
+        with open(archive, 'rb') as file:
+            offset = len(file.readline())
+        with self.assertRaisesMessage(
+            CommandError, f'со смещения {offset}: IntegrityError'
+        ):
+            call_command('import_jsonl', archive, '--batch-size', '1',
+                         stdout=io.StringIO())
+        self.assertEqual(ImportCheckpoint.objects.get().offset, offset)
+        self.assertEqual(Post.objects.count(), 1)
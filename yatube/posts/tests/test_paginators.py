@@ -0,0 +1,136 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yatube.settings import PAGINATOR_CONST
+
+from ..models import Post, User
+from ..paginators import CachedCountPaginator, CursorPaginator
+
+USERNAME = 'User'
+POSTS_COUNT = PAGINATOR_CONST * 2 + 5
+PROFILE_URL = reverse('posts:profile', args=[USERNAME])
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}')
+            for i in range(POSTS_COUNT)
+        )
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+        cls.guest_client = Client()
+
+    def get_page(self, query=''):
+        response = self.guest_client.get(PROFILE_URL + query)
+        return response.context['page_obj']
+
+    def test_walk_forward_and_back(self):
+        """Курсоры обходят ленту без пропусков и повторов."""
+        seen, pages = [], []
+        page = self.get_page()
+        while True:
+            pages.append(page)
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                break
+            page = self.get_page(f'?cursor={page.next_cursor}')
+        self.assertEqual(seen, self.expected)
+        self.assertFalse(pages[0].has_previous())
+        back = self.get_page(f'?cursor={pages[-1].previous_cursor}')
+        self.assertEqual(
+            [post.pk for post in back], [post.pk for post in pages[-2]]
+        )
+
+    def test_no_count_query(self):
+        """Курсорная страница не выполняет COUNT(*)."""
+        paginator = CursorPaginator(Post.objects.all(), PAGINATOR_CONST)
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.get_cursor_page()
+            page.has_next()
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+
+    def test_legacy_page_number(self):
+        """Старые ссылки ?page=N отдают ту же страницу, что и раньше."""
+        page = self.get_page('?page=2')
+        self.assertEqual(
+            [post.pk for post in page],
+            self.expected[PAGINATOR_CONST:PAGINATOR_CONST * 2]
+        )
+
+    def test_broken_cursor(self):
+        """Битый курсор ведёт на первую страницу."""
+        page = self.get_page('?cursor=broken')
+        self.assertEqual(
+            [post.pk for post in page], self.expected[:PAGINATOR_CONST]
+        )
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}')
+            for i in range(POSTS_COUNT)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self):
+        paginator = CachedCountPaginator(Post.objects.all(), 1)
+        with CaptureQueriesContext(connection) as queries:
+            list(paginator.get_page(2))
+        return len(queries)
+
+    def test_count_is_cached_and_invalidated(self):
+        """COUNT(*) кешируется и сбрасывается новым постом."""
+        self.assertEqual(self.count_queries(), 2)
+        self.assertEqual(self.count_queries(), 1)
+        Post.objects.create(author=self.user, text='новый')
+        self.assertEqual(self.count_queries(), 2)
+
+    @override_settings(PAGINATOR_ESTIMATE_LIMIT=POSTS_COUNT)
+    def test_estimate_survives_writes(self):
+        self.count_queries()
+        Post.objects.create(author=self.user, text='новый')
+        paginator = CachedCountPaginator(Post.objects.all(), 1)
+        self.assertEqual(paginator.count, POSTS_COUNT)
+        self.assertTrue(paginator.count_is_estimate)
+
+    def test_empty_queryset(self):
+        """Заведомо пустой запрос: ноль без обращения к базе."""
+        for queryset in (Post.objects.none(),
+                         Post.objects.filter(author_id__in=[])):
+            with self.subTest(queryset=queryset):
+                paginator = CachedCountPaginator(queryset, 1)
+                with self.assertNumQueries(0):
+                    self.assertEqual(paginator.count, 0)
+                self.assertEqual(list(paginator.get_page(2)), [])
+
+    @override_settings(PAGINATOR_WINDOW=2)
+    def test_page_window(self):
+        paginator = CachedCountPaginator(Post.objects.all(), 1)
+        cases = [
+            [1, [1, 2, 3, None, POSTS_COUNT]],
+            [4, [1, 2, 3, 4, 5, 6, None, POSTS_COUNT]],
+            [10, [1, None, 8, 9, 10, 11, 12, None, POSTS_COUNT]],
+            [POSTS_COUNT, [1, None] + list(
+                range(POSTS_COUNT - 2, POSTS_COUNT + 1))],
+        ]
+        for number, window in cases:
+            with self.subTest(number=number):
+                self.assertEqual(
+                    paginator.get_page(number).page_window, window
+                )
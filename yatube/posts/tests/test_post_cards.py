@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+AUTHOR = 'Author'
+CARD = 'posts/includes/post_card.html'
+PROFILE_URL = reverse('posts:profile', args=[AUTHOR])
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=AUTHOR, first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def card_renders(self, url=PROFILE_URL):
+        response = self.client.get(url)
+        return [t.name for t in response.templates].count(CARD)
+
+    def test_cards_are_cached(self):
+        Post.objects.create(author=self.author, text='Второй')
+        self.assertEqual(self.card_renders(), 2)
+        self.assertEqual(self.card_renders(), 0)
+        # Страница поста берёт ту же карточку, что и лента.
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertEqual(self.card_renders(url), 0)
+        group_url = reverse('posts:group_list', args=['slug'])
+        self.assertEqual(self.card_renders(group_url), 1)
+
+    def test_changes_refresh_card(self):
+        """Правка поста, имени автора и группы видна сразу."""
+        self.client.get(PROFILE_URL)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.author.first_name = 'Другое'
+        self.author.save()
+        self.group.title = 'Новая группа'
+        self.group.save()
+        content = self.client.get(PROFILE_URL).content.decode()
+        for text in ('Новый текст', 'Другое Фамилия', 'Новая группа'):
+            with self.subTest(text=text):
+                self.assertIn(text, content)
@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import resolve, reverse
+
+from yatube.settings import PAGINATOR_CONST
+
+from .. import search
+from ..models import Comment, Follow, Group, Post, User
+from ..urls import urlpatterns
+
+USERNAME = 'reader'
+AUTHOR = 'author'
+SLUG = 'slug'
+
+
+class QueryCountTest(TestCase):
+    """Число SQL-запросов на страницу не зависит от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.group = Group.objects.create(
+            title='Группа', slug=SLUG, description='Описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = cls.create_posts(1)[0]
+        cls.client_user = Client()
+        cls.client_user.force_login(cls.user)
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.author)
+        post_id = cls.post.pk
+        # fts_enabled один раз на процесс читает sqlite_master.
+        search.fts_enabled()
+        # url, клиент, метод, ожидаемое число запросов
+        cls.cases = [
+            [reverse('posts:index'), cls.client_user, 'get', 3],
+            [reverse('posts:post_create'), cls.client_user, 'get', 3],
+            [reverse('posts:group_list', args=[SLUG]),
+             cls.client_user, 'get', 4],
+            [reverse('posts:profile', args=[AUTHOR]),
+             cls.client_user, 'get', 6],
+            [reverse('posts:post_detail', args=[post_id]),
+             cls.client_user, 'get', 4],
+            [reverse('posts:post_edit', args=[post_id]),
+             cls.client_author, 'get', 4],
+            [reverse('posts:add_comment', args=[post_id]),
+             cls.client_user, 'post', 7],
+            [reverse('posts:follow_index'), cls.client_user, 'get', 6],
+            [reverse('posts:profile_follow', args=[AUTHOR]),
+             cls.client_user, 'get', 6],
+            [reverse('posts:profile_unfollow', args=[AUTHOR]),
+             cls.client_user, 'get', 10],
+            [reverse('posts:post_comments', args=[post_id]),
+             cls.client_user, 'get', 4],
+            [reverse('posts:search') + '?q=0', cls.client_user, 'get', 5],
+            [reverse('posts:index_rss'), cls.client_user, 'get', 1],
+            [reverse('posts:index_atom'), cls.client_user, 'get', 1],
+            [reverse('posts:group_rss', args=[SLUG]),
+             cls.client_user, 'get', 1],
+            [reverse('posts:group_atom', args=[SLUG]),
+             cls.client_user, 'get', 1],
+            [reverse('posts:profile_rss', args=[AUTHOR]),
+             cls.client_user, 'get', 1],
+            [reverse('posts:profile_atom', args=[AUTHOR]),
+             cls.client_user, 'get', 1],
+            [reverse('posts:export_posts'), cls.client_user, 'get', 3],
+            [reverse('posts:export_comments'), cls.client_user, 'get', 3],
+            [reverse('posts:export_follows'), cls.client_user, 'get', 3],
+        ]
+
+    @classmethod
+    def create_posts(cls, count):
+        posts = []
+        start = Post.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create_user(username=f'{AUTHOR}{i}')
+            group = Group.objects.create(
+                title=f'Группа {i}', slug=f'{SLUG}-{i}', description='-'
+            )
+            Follow.objects.create(user=cls.user, author=author)
+            for post_author, post_group in (
+                (author, group), (cls.author, cls.group)
+            ):
+                post = Post.objects.create(
+                    author=post_author, group=post_group, text=str(i)
+                )
+                Comment.objects.create(post=post, author=author, text='-')
+                posts.append(post)
+        return posts
+
+    def check_queries(self):
+        for url, client, method, expected in self.cases:
+            with self.subTest(url=url, method=method):
+                cache.clear()
+                # Тело формы — только POST: у GET оно затёрло бы ?q=.
+                data = {'text': 'Текст'} if method == 'post' else None
+                with self.assertNumQueries(expected):
+                    response = getattr(client, method)(url, data)
+                    # Выгрузка читает базу, пока отдаёт тело.
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                Follow.objects.get_or_create(
+                    user=self.user, author=self.author
+                )
+
+    def test_every_route_is_pinned(self):
+        self.assertEqual(
+            {resolve(url.split('?')[0]).url_name for url, *_ in self.cases},
+            {pattern.name for pattern in urlpatterns},
+        )
+
+    def test_query_count_is_constant(self):
+        self.check_queries()
+        self.create_posts(PAGINATOR_CONST)
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text='-')
+            for _ in range(PAGINATOR_CONST)
+        )
+        self.check_queries()
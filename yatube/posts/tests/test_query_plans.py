@@ -0,0 +1,146 @@
+import re
+import unittest
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+USERNAME = 'reader'
+AUTHOR = 'author'
+SLUG = 'slug'
+# Строки плана SQLite, означающие полный проход или сортировку в памяти.
+BAD_PLANS = ('USE TEMP B-TREE',)
+# Граница курсора в SQL и шаг плана, который ищет её по индексу.
+BOUND_RE = re.compile(r'"(pub_date|created)" [<>]')
+SEEK_RE = re.compile(
+    r'^SEARCH .* USING (COVERING )?INDEX .*\(.*(pub_date|created)[<>]'
+)
+
+
+def plan(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryLog(list):
+    """(sql, params) как их выполняет приложение.
+
+    План строится по запросу с параметрами: если подставить значения
+    в текст, SQLite сам выводит диапазон из констант и план отличается.
+    """
+
+    def __call__(self, execute, sql, params, many, context):
+        self.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def bad_steps(sql):
+    """Шаги плана без индекса: SCAN таблицы или временное B-дерево.
+
+    SCAN по индексу допустим для первой страницы ленты с LIMIT или
+    COUNT(*) по покрывающему индексу; запросы с границей курсора
+    дополнительно проверяет seeks.
+    """
+    return [
+        step for step in plan(sql)
+        if step.startswith(BAD_PLANS)
+        or (step.startswith('SCAN') and 'INDEX' not in step)
+    ]
+
+
+def seeks(sql, params):
+    """Граница курсора ищется по индексу, а не обходом от начала."""
+    return any(SEEK_RE.search(step) for step in plan(sql, params))
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'планы SQLite')
+class QueryPlanTest(TestCase):
+    """Запросы страниц идут по индексам без сортировки в памяти.
+
+    Поиск не проверяется: выдача сортируется по рангу bm25.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.group = Group.objects.create(
+            title='Группа', slug=SLUG, description='Описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {i}')
+            for i in range(12)
+        ]
+        cls.post = posts[0]
+        for post in posts:
+            Comment.objects.create(post=post, author=cls.user, text='-')
+        for _ in range(settings.COMMENTS_PER_PAGE):
+            Comment.objects.create(post=cls.post, author=cls.user, text='-')
+        cls.client_user = Client()
+        cls.client_user.force_login(cls.user)
+        post_id = cls.post.pk
+        cls.urls = [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=[SLUG]),
+            reverse('posts:profile', args=[AUTHOR]),
+            reverse('posts:post_detail', args=[post_id]),
+            reverse('posts:post_comments', args=[post_id]),
+            reverse('posts:follow_index'),
+            reverse('posts:follow_index') + '?page=1',
+            reverse('posts:post_edit', args=[post_id]),
+        ]
+
+    def test_no_full_scans_or_sorts(self):
+        for url in self.urls:
+            for client in (Client(), self.client_user):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                    if response.context and 'page_obj' in response.context:
+                        next_cursor = getattr(
+                            response.context['page_obj'], 'next_cursor', None
+                        )
+                        if next_cursor:
+                            client.get(url, {'cursor': next_cursor})
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT'):
+                        continue
+                    with self.subTest(url=url, sql=sql):
+                        self.assertEqual(bad_steps(sql), [])
+
+    def test_cursor_pages_seek(self):
+        """Следующая страница по курсору — SEARCH по индексу с датой."""
+        post_id = self.post.pk
+        urls = [
+            (reverse('posts:index'), 'page_obj'),
+            (reverse('posts:group_list', args=[SLUG]), 'page_obj'),
+            (reverse('posts:profile', args=[AUTHOR]), 'page_obj'),
+            (reverse('posts:follow_index'), 'page_obj'),
+            (reverse('posts:post_comments', args=[post_id]), 'comments'),
+        ]
+        for url, name in urls:
+            cache.clear()
+            cursor = self.client_user.get(url).context[name].next_cursor
+            self.assertIsNotNone(cursor, url)
+            queries = QueryLog()
+            with connection.execute_wrapper(queries):
+                self.client_user.get(url, {'cursor': cursor})
+            bounded = [
+                (sql, params) for sql, params in queries
+                if BOUND_RE.search(sql)
+            ]
+            self.assertTrue(bounded, url)
+            for sql, params in bounded:
+                with self.subTest(url=url, sql=sql):
+                    self.assertTrue(seeks(sql, params), plan(sql, params))
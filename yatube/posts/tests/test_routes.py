@@ -23,12 +23,20 @@ class RoutesTest(TestCase):
              f'/posts/{POST_ID}/'],
             ['follow_index', [],
              '/follow/'],
+            ['search', [],
+             '/search/'],
             ['profile_follow', [USERNAME],
              f'/profile/{USERNAME}/follow/'],
             ['profile_unfollow', [USERNAME],
              f'/profile/{USERNAME}/unfollow/'],
             ['add_comment', [POST_ID],
              f'/posts/{POST_ID}/comment'],
+            ['index_rss', [],
+             '/rss/'],
+            ['group_atom', [SLUG],
+             f'/group/{SLUG}/atom/'],
+            ['profile_rss', [USERNAME],
+             f'/profile/{USERNAME}/rss/'],
         ]
         for route, args, adress in cases:
             with self.subTest(route=route):
@@ -0,0 +1,91 @@
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+from ..search import search_post_ids
+
+SEARCH_URL = reverse('posts:search')
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        cls.best = Post.objects.create(
+            author=cls.user, group=cls.group, text='котики котики котики'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='собаки и один котик котики'
+        )
+        cls.commented = Post.objects.create(author=cls.user, text='птицы')
+        Comment.objects.create(
+            post=cls.commented, author=cls.user, text='а где котики?'
+        )
+        cls.guest_client = Client()
+
+    def found(self, **params):
+        response = self.guest_client.get(SEARCH_URL, params)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_ranked_posts_and_comments(self):
+        """Сначала самые релевантные; совпадение в комментарии — его пост."""
+        found = self.found(q='котики')
+        self.assertEqual(found[0], self.best.pk)
+        self.assertCountEqual(
+            found, [self.best.pk, self.other.pk, self.commented.pk]
+        )
+
+    def test_filters(self):
+        self.assertEqual(
+            self.found(q='котики', group=self.group.slug), [self.best.pk]
+        )
+        response = self.guest_client.get(
+            SEARCH_URL, {'q': 'котики', 'author': 'nobody'}
+        )
+        self.assertIsNone(response.context['page_obj'])
+
+    def test_cursor_pages(self):
+        with self.settings(PAGINATOR_CONST=1):
+            response = self.guest_client.get(SEARCH_URL, {'q': 'котики'})
+            seen = []
+            while True:
+                page = response.context['page_obj']
+                seen.extend(post.pk for post in page)
+                if not page.has_next():
+                    break
+                response = self.guest_client.get(
+                    SEARCH_URL, {'q': 'котики', 'cursor': page.next_cursor}
+                )
+        self.assertEqual(seen, self.found(q='котики'))
+
+    def test_index_follows_writes(self):
+        Post.objects.filter(pk=self.other.pk).update(text='только собаки')
+        Post.objects.filter(pk=self.commented.pk).delete()
+        self.assertEqual(self.found(q='котики'), [self.best.pk])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_search')
+        call_command(
+            'rebuild_search_index', batch_size=1,
+            stdout=open('/dev/null', 'w'),
+        )
+        self.assertEqual(len(search_post_ids('котики')), 3)
+
+    def test_admin_search(self):
+        request = RequestFactory().get('/')
+        admin = site._registry[Post]
+        queryset, _ = admin.get_search_results(
+            request, Post.objects.all(), 'котики'
+        )
+        self.assertCountEqual(
+            queryset.values_list('pk', flat=True),
+            [self.best.pk, self.other.pk],
+        )
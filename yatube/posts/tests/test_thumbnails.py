@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import get_version
+
+from .. import thumbnails
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+USERNAME = 'author'
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+PLACEHOLDER = 'aspect-ratio'
+PROFILE_URL = reverse('posts:profile', args=[USERNAME])
+INDEX_URL = reverse('posts:index')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def upload(self):
+        return SimpleUploadedFile(
+            name='small.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+
+    def test_placeholder_until_ready(self):
+        """Пока миниатюры нет, страница не ресайзит картинку сама."""
+        post = Post.objects.create(
+            author=self.user, text='-', image=self.upload()
+        )
+        with mock.patch('posts.thumbnails.get_thumbnail') as get_thumbnail:
+            content = self.client.get(PROFILE_URL).content.decode()
+        get_thumbnail.assert_not_called()
+        self.assertIn(PLACEHOLDER, content)
+        thumbnails.generate(post.image.name)
+        ready = thumbnails.get_ready(post.image.name, 'card')
+        content = self.client.get(PROFILE_URL).content.decode()
+        self.assertIn(ready['url'], content)
+        self.assertNotIn(PLACEHOLDER, content)
+
+    @override_settings(PAGE_CACHE_TTL=60)
+    def test_ready_thumbnail_refreshes_cached_pages(self):
+        """Готовая миниатюра сменяет заглушку в кешированных страницах."""
+        post = Post.objects.create(
+            author=self.user, text='-', image=self.upload()
+        )
+        with mock.patch('posts.thumbnails.get_thumbnail'):
+            self.client.get(INDEX_URL)
+            self.client.force_login(self.user)
+            self.assertIn(
+                PLACEHOLDER, self.client.get(INDEX_URL).content.decode()
+            )
+            self.client.logout()
+        posts_version = get_version('posts')
+        thumbnails.generate(post.image.name)
+        # Готовая миниатюра не сбрасывает счётчики, ленты RSS и прочее.
+        self.assertEqual(get_version('posts'), posts_version)
+        ready = thumbnails.get_ready(post.image.name, 'card')
+        for login in (False, True):
+            with self.subTest(login=login):
+                if login:
+                    self.client.force_login(self.user)
+                content = self.client.get(INDEX_URL).content.decode()
+                self.assertIn(ready['url'], content)
+                self.assertNotIn(PLACEHOLDER, content)
@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry, User, UserStats
+
+READER = 'reader'
+AUTHOR = 'author'
+FOLLOW_INDEX_URL = reverse('posts:follow_index')
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username=READER)
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.client_reader = Client()
+        cls.client_reader.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def feed(self):
+        response = self.client_reader.get(FOLLOW_INDEX_URL)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_fan_out_and_backfill(self):
+        """Пост попадает в ленты подписчиков, подписка дозаполняет ленту."""
+        old = Post.objects.create(author=self.author, text='старый')
+        Follow.objects.create(user=self.reader, author=self.author)
+        new = Post.objects.create(author=self.author, text='новый')
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(self.feed(), [new.pk, old.pk])
+
+    def test_unfollow_prunes_timeline(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(author=self.author, text='текст')
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_heavy_author_merged_on_read(self):
+        """Посты популярного автора подмешиваются при чтении."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+        posts = [
+            Post.objects.create(author=self.author, text=str(i))
+            for i in range(3)
+        ]
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [post.pk for post in posts[::-1]])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_back_below_limit(self):
+        """Посты «тяжёлого» периода остаются в ленте после отписок."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        self.assertTrue(UserStats.objects.get(user=self.author).heavy)
+        post = Post.objects.create(author=self.author, text='текст')
+        self.assertFalse(TimelineEntry.objects.exists())
+        Follow.objects.filter(user=other).delete()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post
+        ).exists())
+        self.assertEqual(self.feed(), [post.pk])
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='текст')
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.feed(), [post.pk])
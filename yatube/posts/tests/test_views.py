@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from array import array
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
@@ -7,6 +8,9 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.cache import cache
 
+from core.cache import get_stats, get_version
+
+from posts.follow_graph import FOLLOWING, graph
 from posts.models import Group, Post, User, Follow
 
 from yatube.settings import PAGINATOR_CONST
@@ -156,18 +160,32 @@ class PostsPagesTests(TestCase):
         self.assertEqual(group.description, self.group.description)
 
     def test_cache(self):
-        posts_count = Post.objects.count()
+        cache.clear()
         response = self.authorized_client.get(HOME_URL).content
-        Post.objects.create(
-            text=TEXT, author=self.user
-        )
-        self.assertEqual(Post.objects.count(), posts_count + 1)
+        # update() не шлёт сигналов: страница по-прежнему из кеша.
+        Post.objects.filter(pk=self.post.pk).update(text=TEXT2)
         self.assertEqual(
             response, self.authorized_client.get(HOME_URL).content)
-        cache.clear()
+        self.assertEqual(get_stats('index_page'), {'hits': 1, 'misses': 1})
+        Post.objects.create(
+            text=TEXT3, author=self.user
+        )
         self.assertNotEqual(
             response, self.authorized_client.get(HOME_URL).content)
 
+    def test_cache_varies_by_page_and_auth(self):
+        for post in range(PAGINATOR_CONST):
+            Post.objects.create(author=self.user2, text='text')
+        cache.clear()
+        first = self.authorized_client.get(HOME_URL).content
+        cases = [
+            [self.authorized_client, HOME_URL + '?page=2'],
+            [self.client, HOME_URL],
+        ]
+        for client, url in cases:
+            with self.subTest(url=url):
+                self.assertNotEqual(first, client.get(url).content)
+
     def test_follow_auth(self):
         follow_count = Follow.objects.count()
         self.auth_client_not_author.get(PROFILE_FOLLOW_URL)
@@ -177,6 +195,34 @@ class PostsPagesTests(TestCase):
                 user=self.not_author, author=self.author).exists()
         )
 
+    def test_follow_index_without_follows(self):
+        """Читатель без подписок получает пустую ленту, а не ошибку."""
+        for page in (1, 2):
+            with self.subTest(page=page):
+                response = self.auth_client_not_author.get(
+                    FOLLOW_INDEX_URL, {'page': page}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_follow_with_stale_graph(self):
+        """Граф другого процесса отстал: повторная подписка не падает."""
+        self.auth_client_not_author.get(PROFILE_FOLLOW_URL)
+        # Массив процесса, который не видел подписку, под свежей версией.
+        graph._store(
+            FOLLOWING, self.not_author.pk,
+            get_version(f'{FOLLOWING}:{self.not_author.pk}'), array('q'),
+        )
+        self.addCleanup(graph.clear)
+        self.assertFalse(
+            graph.is_following(self.not_author.pk, self.author.pk)
+        )
+        response = self.auth_client_not_author.get(PROFILE_FOLLOW_URL)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Follow.objects.filter(
+            user=self.not_author, author=self.author
+        ).count(), 1)
+
     def test_unfollow_auth(self):
         follow_count = Follow.objects.count()
         self.authorized_client.get(PROFILE_UNFOLLOW_URL)
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+from core import metrics
+from core.cache import bump_version
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+KEY = 'thumbnail:{}:{}'
+# Версия страниц и ответов, которые показывают миниатюры.
+NAMESPACE = 'thumbnails'
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def get_ready(name, alias):
+    """Готовая миниатюра из кеша или None; сама ничего не генерирует."""
+    thumbnail = cache.get(KEY.format(alias, name))
+    metrics.cache_lookup(thumbnail is not None)
+    return thumbnail
+
+
+def generate(name):
+    """Строит миниатюры name во всех размерах из POST_THUMBNAILS.
+
+    Готовые миниатюры сбрасывают версию NAMESPACE: от неё зависят
+    лишь лента на главной, страницы гостей с карточками и ответы API,
+    а счётчики, RSS и прочее на версии posts остаются в кеше.
+    """
+    start = time.perf_counter()
+    try:
+        if not default_storage.exists(name):
+            return
+        for alias, (geometry, options) in settings.POST_THUMBNAILS.items():
+            thumbnail = get_thumbnail(name, geometry, **options)
+            cache.set(KEY.format(alias, name), {
+                'url': thumbnail.url,
+                'width': thumbnail.width,
+                'height': thumbnail.height,
+            }, None)
+        bump_version(NAMESPACE)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры %s', name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+        close_old_connections()
+        elapsed = time.perf_counter() - start
+        registry.observe('yatube_thumbnail_seconds', elapsed)
+        # При THUMBNAIL_WORKERS = 0 строим внутри запроса.
+        metrics.add_timing('thumbnail', elapsed)
+
+
+def _submit(name):
+    global _executor
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+        if settings.THUMBNAIL_WORKERS and _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.THUMBNAIL_WORKERS, thread_name_prefix='thumbnails'
+            )
+    if settings.THUMBNAIL_WORKERS:
+        _executor.submit(generate, name)
+    else:
+        generate(name)
+
+
+def schedule(name):
+    """Ставит генерацию в очередь после фиксации транзакции."""
+    transaction.on_commit(lambda: _submit(name))
@@ -0,0 +1,143 @@
+import heapq
+
+from django.conf import settings
+
+from .models import Follow, Post, TimelineEntry, UserStats
+from .paginators import CursorPaginator, seek
+
+
+def is_heavy(author_id):
+    """Посты автора подмешиваются при чтении, а не раскладываются.
+
+    Флаг UserStats.heavy хранится в базе и меняется в той же
+    транзакции, что и подписка, поэтому все процессы видят одно
+    и то же и пост всегда попадает ровно в один из двух путей.
+    """
+    return UserStats.objects.filter(user_id=author_id, heavy=True).exists()
+
+
+def pulled_authors(user):
+    return list(Follow.objects.filter(
+        user=user, author__stats__heavy=True
+    ).values_list('author_id', flat=True))
+
+
+def _bulk_insert(user_ids, posts):
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in user_ids
+            for post_id, pub_date in posts
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_heavy(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(followers.iterator(), [(post.pk, post.pub_date)])
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту читателя посты автора после подписки."""
+    if is_heavy(author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    _bulk_insert([user_id], posts.iterator())
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def update_heavy(author_id):
+    """Переключает автора по числу подписчиков после (от)подписки.
+
+    Разложенные раньше записи при переходе в «тяжёлые» остаются:
+    при чтении они сливаются с подмешанными. При возврате ленты
+    подписчиков дозаполняются постами, которые не раскладывались.
+    """
+    stats = UserStats.objects.filter(user_id=author_id)
+    row = stats.select_for_update().values_list(
+        'heavy', 'followers_count'
+    ).first()
+    if row is None:
+        return
+    heavy, followers = row
+    if heavy == (followers > settings.TIMELINE_FANOUT_LIMIT):
+        return
+    stats.update(heavy=not heavy)
+    if heavy:
+        followers = Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+        for user_id in followers.iterator():
+            backfill(user_id, author_id)
+
+
+def reconcile_heavy():
+    """Выставляет флаги по счётчикам — перед полной пересборкой лент."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    UserStats.objects.filter(
+        heavy=False, followers_count__gt=limit
+    ).update(heavy=True)
+    UserStats.objects.filter(
+        heavy=True, followers_count__lte=limit
+    ).update(heavy=False)
+
+
+def rebuild(user):
+    """Пересобирает ленту читателя целиком по таблице подписок."""
+    TimelineEntry.objects.filter(user=user).delete()
+    authors = Follow.objects.filter(user=user).exclude(
+        author__stats__heavy=True
+    ).values_list('author_id', flat=True)
+    posts = Post.objects.filter(
+        author_id__in=authors
+    ).values_list('pk', 'pub_date')
+    _bulk_insert([user.pk], posts.iterator())
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная лента подписок поверх TimelineEntry.
+
+    Ключи страницы берутся одним проходом по индексу
+    (user, pub_date, post) и сливаются с постами «тяжёлых» авторов.
+    """
+
+    def __init__(self, user, per_page, **kwargs):
+        super().__init__(Post.objects.for_feed(), per_page, **kwargs)
+        self.user = user
+
+    def fetch(self, bound, backwards, limit):
+        sources = [
+            seek(TimelineEntry.objects.filter(user=self.user), bound,
+                 backwards, pk_field='post_id')
+            .values_list('pub_date', 'post_id')[:limit]
+        ]
+        pulled = pulled_authors(self.user)
+        if pulled:
+            sources.append(
+                seek(Post.objects.filter(author_id__in=pulled), bound,
+                     backwards)
+                .values_list('pub_date', 'pk')[:limit]
+            )
+        keys = []
+        for key in heapq.merge(*sources, reverse=not backwards):
+            if keys and keys[-1] == key:
+                continue
+            keys.append(key)
+            if len(keys) == limit:
+                break
+        posts = self.object_list.in_bulk([pk for _, pk in keys])
+        return [posts[pk] for _, pk in keys if pk in posts]
@@ -1,17 +1,51 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = "posts"
 urlpatterns = [
     path('', views.index, name='index'),
+    path('rss/', feeds.cached(feeds.PostsFeed()), name='index_rss'),
+    path('atom/', feeds.cached(feeds.PostsAtomFeed()), name='index_atom'),
     path('create/', views.post_create, name='post_create'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/rss/',
+        feeds.cached(feeds.GroupFeed()),
+        name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        feeds.cached(feeds.GroupAtomFeed()),
+        name='group_atom'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.cached(feeds.AuthorFeed()),
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.cached(feeds.AuthorAtomFeed()),
+        name='profile_atom'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
+    path('export/posts/', views.export, {'dataset': 'posts'},
+         name='export_posts'),
+    path('export/comments/', views.export, {'dataset': 'comments'},
+         name='export_comments'),
+    path('export/follows/', views.export, {'dataset': 'follows'},
+         name='export_follows'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,55 +1,127 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from django.http import HttpResponseRedirect
+from django.utils.cache import add_never_cache_headers
+from django.views.decorators.http import condition, require_safe
+from django.http import (Http404, HttpResponseBadRequest,
+                         HttpResponseRedirect, StreamingHttpResponse)
 
-from .forms import PostForm, CommentForm
+from core.db import atomic_write
+from core.page_cache import cache_anonymous
+
+from . import conditions, exports
+from .follow_graph import graph
+from .forms import PostForm, CommentForm, ExportForm, SearchForm
 from .models import Group, Post, User, Follow
+from .paginators import CachedCountPaginator, CursorPaginator
+from .search import SearchPaginator, fallback_queryset, fts_enabled
+from .timeline import TimelinePaginator
+
+
+def paginator_view(request, post_list, cursor_paginator=None,
+                   namespaces=("posts",)):
+    if "page" in request.GET:
+        # Старые ссылки вида ?page=N продолжают работать через OFFSET.
+        paginator = CachedCountPaginator(
+            post_list, settings.PAGINATOR_CONST, namespaces
+        )
+        return paginator.get_page(request.GET["page"])
+    paginator = cursor_paginator or CursorPaginator(
+        post_list, settings.PAGINATOR_CONST
+    )
+    return paginator.get_cursor_page(request.GET.get("cursor"))
 
 
-def paginator_view(request, post_list):
-    paginator = Paginator(post_list, settings.PAGINATOR_CONST)
-    page_number = request.GET.get("page")
-    return paginator.get_page(page_number)
+def comments_page(request, post):
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        key_field='created',
+    )
+    return paginator.get_cursor_page(request.GET.get("cursor"))
 
 
-# @cache_page(15, key_prefix='index_page')
+@cache_anonymous(conditions.feed_tags)
+@condition(etag_func=conditions.feed_etag)
 def index(request):
     return render(request, "posts/index.html", {
-        "page_obj": paginator_view(request, Post.objects.all())
+        "page_obj": paginator_view(request, Post.objects.for_feed())
     })
 
 
+@cache_anonymous(conditions.feed_tags)
+@condition(etag_func=conditions.feed_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     return render(request, "posts/group_list.html", {
         "group": group,
-        "page_obj": paginator_view(request, group.posts.all()),
+        "page_obj": paginator_view(request, group.posts.for_feed()),
     })
 
 
+@cache_anonymous(conditions.profile_tags)
+@condition(etag_func=conditions.profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     following = (
         request.user.is_authenticated
         and request.user.username != username
-        and Follow.objects.filter(user=request.user, author=author).exists()
+        and graph.is_following(request.user.pk, author.pk)
     )
     return render(request, "posts/profile.html", {
         "author": author,
-        "page_obj": paginator_view(request, author.posts.all()),
+        "page_obj": paginator_view(request, author.posts.for_feed()),
         'following': following,
     })
 
 
+@cache_anonymous(conditions.post_tags)
+@condition(etag_func=conditions.post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.for_detail(), pk=post_id)
     form = CommentForm(request.POST or None)
     return render(request, "posts/post_detail.html", {
         'post': post,
         'form': form,
-        'comments': post.comments.all(),
+        'comments': comments_page(request, post),
+    })
+
+
+@cache_anonymous(conditions.post_tags)
+@condition(etag_func=conditions.post_etag)
+def post_comments(request, post_id):
+    """Фрагмент со следующей пачкой комментариев."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return render(request, "posts/includes/comment_list.html", {
+        'post': post,
+        'comments': comments_page(request, post),
+    })
+
+
+def search(request):
+    form = SearchForm(request.GET or None)
+    page_obj = None
+    if form.is_valid():
+        query, group, author = (
+            form.cleaned_data[field] for field in ("q", "group", "author")
+        )
+        if fts_enabled():
+            page_obj = SearchPaginator(
+                query, settings.PAGINATOR_CONST, group, author
+            ).get_cursor_page(request.GET.get("cursor"))
+        else:
+            page_obj = paginator_view(
+                request, fallback_queryset(query, group, author)
+            )
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    params.pop("page", None)
+    return render(request, "posts/search.html", {
+        "form": form,
+        "page_obj": page_obj,
+        "page_query": params.urlencode() + "&" if params else "",
     })
 
 
@@ -58,8 +130,10 @@ def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
         return render(request, "posts/create_post.html", {"form": form})
-    form.instance.author = request.user
-    form.save()
+    post = form.save(commit=False)
+    post.author = request.user
+    atomic_write(post.save)()
+    form.save_variants()
     return redirect("posts:profile", username=request.user)
 
 
@@ -74,7 +148,8 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        atomic_write(form.save(commit=False).save)()
+        form.save_variants()
         return redirect("posts:post_detail", post_id=post.id)
     return render(request, "posts/create_post.html", {
         "form": form,
@@ -91,15 +166,20 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        atomic_write(comment.save)()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    page_obj = paginator_view(request, Post.objects.filter(
-        author__following__user=request.user
-    ))
+    page_obj = paginator_view(
+        request,
+        Post.objects.for_feed().filter(
+            author_id__in=graph.following(request.user.pk)
+        ),
+        TimelinePaginator(request.user, settings.PAGINATOR_CONST),
+        ("posts", f"follow:{request.user.pk}"),
+    )
     return render(request, 'posts/follow.html', {
         'page_obj': page_obj,
     })
@@ -109,16 +189,50 @@ def follow_index(request):
 def profile_follow(request, username):
     if request.user.username != username:
         author = get_object_or_404(User, username=username)
-        Follow.objects.get_or_create(user=request.user, author=author)
+        # Не по графу: в другом процессе он мог устареть.
+        atomic_write(Follow.objects.get_or_create)(
+            user=request.user, author=author
+        )
         return redirect('posts:profile', username)
     return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
 
 
 @login_required
 def profile_unfollow(request, username):
-    get_object_or_404(
-        Follow,
-        user=request.user,
-        author__username=username
-    ).delete()
+    deleted, _ = atomic_write(Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete)()
+    if not deleted:
+        raise Http404
     return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_safe
+def export(request, dataset):
+    """Потоковая выгрузка; не персонал получает только свои данные."""
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    filters = form.filters()
+    if not request.user.is_staff:
+        filters[exports.DATASETS[dataset].owner] = request.user.username
+    fmt = form.cleaned_data['format'] or 'csv'
+    compress = form.cleaned_data['gzip']
+    try:
+        content = exports.stream(
+            dataset, fmt, filters,
+            form.cleaned_data['since'], form.cleaned_data['until'], compress,
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        content,
+        content_type='application/gzip' if compress
+        else exports.CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{exports.filename(dataset, fmt, compress)}"'
+    )
+    add_never_cache_headers(response)
+    return response
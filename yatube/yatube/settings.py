@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import importlib.util
 import os
+import tempfile
 
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"
@@ -41,11 +43,14 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "posts.apps.PostsConfig",
-    "debug_toolbar",
+    "api.apps.ApiConfig",
     "sorl.thumbnail"
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.PrimaryPinMiddleware",
+    "core.middleware.AnonymousPageCacheMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -53,14 +58,19 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# debug_toolbar — только для отладки и только если он установлен.
+DEBUG_TOOLBAR = DEBUG and importlib.util.find_spec("debug_toolbar") is not None
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "yatube.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backend.DjangoTemplates",
         "DIRS": [os.path.join(BASE_DIR, "templates")],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -77,12 +87,36 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "yatube.wsgi.application"
 
+# SQLite с профилем PRAGMA из core.db.PROFILES и постоянными
+# соединениями; при «database is locked» запросы и транзакционные
+# view повторяются SQLITE_LOCK_RETRIES раз с растущей паузой.
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "core.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "PRAGMA_PROFILE": os.environ.get("SQLITE_PROFILE", "production"),
+        "CONN_MAX_AGE": 60,
     }
 }
+SQLITE_LOCK_RETRIES = 5
+SQLITE_LOCK_BACKOFF = 0.05
+
+# Реплики только для чтения (core.db_router). YATUBE_SQLITE_REPLICAS=N
+# поднимает локальную заглушку из N файлов, которые наполняет команда
+# sync_replicas. Реплика, отставшая больше REPLICA_LAG_TOLERANCE секунд,
+# не читается; столько же после записи пользователь читает основную базу.
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+REPLICA_DATABASES = []
+for index in range(1, int(os.environ.get("YATUBE_SQLITE_REPLICAS", 0)) + 1):
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        "ENGINE": "core.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, f"db.{alias}.sqlite3"),
+        "PRAGMA_PROFILE": DATABASES["default"]["PRAGMA_PROFILE"],
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(alias)
+REPLICA_LAG_TOLERANCE = 5
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +148,38 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 PAGINATOR_CONST = 10
+# Нумерованные страницы: ±PAGINATOR_WINDOW ссылок вокруг текущей,
+# COUNT(*) кешируется, а начиная с PAGINATOR_ESTIMATE_LIMIT
+# допускается устаревшая оценка.
+PAGINATOR_WINDOW = 3
+PAGINATOR_COUNT_TTL = 300
+PAGINATOR_ESTIMATE_LIMIT = 10000
+PAGINATOR_ESTIMATE_TTL = 60 * 60
+
+# Лента подписок: авторов с большим числом подписчиков не раскладываем
+# по лентам при публикации, а подмешиваем при чтении.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BATCH_SIZE = 500
+
+# Граф подписок в памяти процесса (posts.follow_graph): сколько байт
+# массивов id держать, прежде чем вытеснять давно не читанные.
+FOLLOW_GRAPH_BUDGET = 16 * 1024 * 1024
+
+# Полнотекстовый поиск (SQLite FTS5).
+SEARCH_REBUILD_BATCH_SIZE = 2000
+ADMIN_SEARCH_LIMIT = 1000
+
+# Загрузка архивов JSONL (posts.importer): строк на транзакцию.
+IMPORT_BATCH_SIZE = 1000
+
+# Потоковая выгрузка (posts.exports): строк на пачку курсора и
+# символов на кусок ответа.
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+# Комментарии к посту отдаются курсорными пачками: первая рисуется
+# со страницей, следующие подгружаются фрагментом.
+COMMENTS_PER_PAGE = 20
 
 INTERNAL_IPS = ["127.0.0.1"]
 
@@ -126,9 +192,70 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Версии ключей core.cache — основа ETag, фрагментов и кеша страниц —
+# должны быть общими для всех воркеров: с LocMemCache процесс, который
+# не видел записи, отвечал бы 304 на устаревший ETag. Файловый кеш
+# общий для процессов одной машины, add и incr в нём атомарны
+# (core.backends.filebased); CACHE_DIR — где его держать.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CACHE_DIR', os.path.join(tempfile.gettempdir(), 'yatube-cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 POST_UPLOAD = 'posts'
+
+# Миниатюры постов строятся фоновыми потоками сразу после сохранения;
+# пока миниатюры нет, шаблон рисует заглушку. 0 — строить синхронно.
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+THUMBNAIL_WORKERS = 2
+# Загрузки перекодируются (posts.images): сторона не больше
+# POST_IMAGE_MAX_SIZE, плюс варианты для srcset этих ширин.
+POST_IMAGE_MAX_SIZE = 2048
+POST_IMAGE_WIDTHS = (320, 640, 960, 1280)
+# Файл без ссылок живёт ещё столько секунд: его может подхватить
+# загрузка тех же байтов до своего retain (core.storage). Потом его
+# удаляет collect_media, которую стоит запускать по cron.
+MEDIA_GC_GRACE = 60 * 60
+# Имена по хешу не меняют содержимое (core.views.media; в бою —
+# те же заголовки на веб-сервере).
+MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Метрики запросов (core.metrics): заголовок Server-Timing и /metrics/
+# для Prometheus. Без токена /metrics/ доступен только персоналу.
+METRICS_SERVER_TIMING = True
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Карточки постов кешируются по отпечатку полей и живут сутки.
+POST_CARD_TTL = 60 * 60 * 24
+
+# core.cache.get_or_compute: устаревшее значение отдаётся ещё
+# CACHE_STALE_TTL секунд, пока один воркер держит блокировку
+# (не дольше CACHE_LOCK_TTL) и пересчитывает его; без значения
+# остальные ждут его до CACHE_LOCK_WAIT. CACHE_XFETCH_BETA > 1
+# обновляет раньше, 0 выключает раннее обновление.
+CACHE_STALE_TTL = 5 * 60
+CACHE_LOCK_TTL = 30
+CACHE_LOCK_WAIT = 2
+CACHE_XFETCH_BETA = 1.0
+
+# Страницы для гостей (core.page_cache): PAGE_CACHE_TTL в нашем кеше,
+# PAGE_CACHE_S_MAXAGE — в CDN. С debug_toolbar выключено: панель
+# попала бы в общий кеш.
+PAGE_CACHE_TTL = 0 if DEBUG_TOOLBAR else 60
+PAGE_CACHE_S_MAXAGE = 60
+
+# RSS/Atom: FEED_ITEMS последних постов, готовый ответ живёт
+# FEED_CACHE_TTL секунд или до новой версии posts.
+FEED_ITEMS = 20
+FEED_CACHE_TTL = 60 * 60
+
+# JSON API (/api/v1/): тело ответа кешируется по ETag на API_CACHE_TTL,
+# клиентам и прокси разрешено хранить его API_MAX_AGE секунд.
+API_CACHE_TTL = 60
+API_MAX_AGE = 10
@@ -1,7 +1,10 @@
+import re
+
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.views import media, metrics
 
 app_name = "posts"
 
@@ -11,9 +14,11 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("auth/", include("django.contrib.auth.urls")),
     path("about/", include("about.urls", namespace="about")),
+    path("api/v1/", include("api.urls", namespace="api")),
+    path("metrics/", metrics, name="metrics"),
 ]
 
-if settings.DEBUG:
+if settings.DEBUG_TOOLBAR:
     import debug_toolbar
 
     urlpatterns += (
@@ -25,6 +30,8 @@ handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
 if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
+    urlpatterns += (
+        re_path(r'^%s(?P<path>.*)$' % re.escape(
+            settings.MEDIA_URL.lstrip('/')
+        ), media),
     )